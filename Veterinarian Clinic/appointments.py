@@ -18,16 +18,47 @@ Features:
 - Real-time appointment updates
 """
 
+import functools
+import os
+import secrets
 import customtkinter as ctk
+import tkinter as tk
 from tkinter import messagebox
 from tkcalendar import Calendar
 from datetime import datetime,date
+from database import SUPPORTS_RETURNING
 
 # Module-level variables injected by main.py
 app = None
 db = None
 refs = {}
 
+# Columns read back after saving an appointment (what the verification compares)
+_APT_COLUMNS = "patient_id, doctor_id, time"
+# Read back and compare every saved appointment only when APT_VERIFY is set
+_VERIFY_SAVES = bool(os.environ.get('APT_VERIFY'))
+# Columns the patient/doctor caches and combobox labels need
+_PATIENT_COLUMNS = "id, name, species, owner_name"
+_DOCTOR_COLUMNS = "id, name, specialization, fee"
+
+# SQL text built once; identical strings keep hitting sqlite3's statement cache
+_PATIENT_BY_ID_SQL = f"SELECT {_PATIENT_COLUMNS} FROM patients WHERE id=?"
+_DOCTOR_BY_ID_SQL = f"SELECT {_DOCTOR_COLUMNS} FROM doctors WHERE id=?"
+_APT_READBACK_SQL = f"SELECT {_APT_COLUMNS} FROM appointments WHERE id=?"
+
+# Patient/doctor rows keyed by id, filled when the view is built so card clicks
+# don't re-query them; cleared through invalidate_lookup_cache()
+_patient_by_id = {}
+_doctor_by_id = {}
+
+# Appointment rows per date and the list of marked (non-cancelled) dates, shared by
+# load_appointments and refresh_calendar_marks; cleared through invalidate_appointment_cache()
+_date_apts_cache = {}
+_marked_dates = [None]
+
+# Bind tag shared by every appointment card so one class binding serves all clicks
+_CARD_TAG = "AppointmentCard"
+
 ## Convert 24-hour time to 12-hour format (HH:MM -> HH:MM AM/PM)
 def format_time_12h(time_24h):
     """Convert 24-hour HH:MM format to 12-hour format with AM/PM"""
@@ -37,6 +68,92 @@ def format_time_12h(time_24h):
     except Exception:
         return time_24h
 
+## Normalize time strings into 24-hour HH:MM format for storage
+def normalize_time(t):
+    """Convert "8:00 AM" or "8:00" to 24-hour HH:MM; anything else is returned unchanged"""
+    # the "8AM" slot labels have no colon and are stored as-is, like existing rows
+    if not t:
+        return t
+    head, sep, rest = str(t).strip().partition(':')
+    if not sep:
+        return t
+    tail, _, suffix = rest.partition(' ')
+    suffix = suffix.strip().upper()
+    if suffix not in ('', 'AM', 'PM'):
+        return t
+    if not (1 <= len(head) <= 2 and len(tail) == 2 and head.isdigit() and tail.isdigit()):
+        return t
+    hours = int(head)
+    minutes = int(tail)
+    if suffix:
+        if not 1 <= hours <= 12:
+            return t
+        hours = hours % 12 + (12 if suffix == 'PM' else 0)
+    if hours > 23 or minutes > 59:
+        return t
+    return f"{hours:02d}:{minutes:02d}"
+
+## Parse an identifier from a combobox display string ("3: Name (...) - Owner" or a plain id)
+@functools.lru_cache(maxsize=256)
+def _parse_id(value):
+    """Return the integer id before the first ':' (or the stripped text if not numeric)."""
+    if not value:
+        return ""
+    head = str(value).partition(":")[0].strip()
+    try:
+        return int(head)
+    except ValueError:
+        return head
+
+## Add a bind tag to a widget and all of its descendants
+def _add_bindtag(widget, tag):
+    widget.bindtags((tag,) + widget.bindtags())
+    for child in widget.winfo_children():
+        _add_bindtag(child, tag)
+
+## Drop cached patient/doctor rows (called by the patient/doctor CRUD paths)
+def invalidate_lookup_cache():
+    _patient_by_id.clear()
+    _doctor_by_id.clear()
+    # cached appointment rows carry patient/doctor names too
+    invalidate_appointment_cache()
+
+## Drop cached appointment rows and calendar marks (called after every appointment write)
+def invalidate_appointment_cache():
+    _date_apts_cache.clear()
+    _marked_dates[0] = None
+
+## Patient row by id from the cache, falling back to the database on a miss
+def _lookup_patient(pid):
+    p = _patient_by_id.get(pid)
+    if p is None:
+        rows = db.query(_PATIENT_BY_ID_SQL, (pid,))
+        if rows:
+            p = _patient_by_id[pid] = rows[0]
+    return p
+
+## Doctor row by id from the cache, falling back to the database on a miss
+def _lookup_doctor(did):
+    d = _doctor_by_id.get(did)
+    if d is None:
+        rows = db.query(_DOCTOR_BY_ID_SQL, (did,))
+        if rows:
+            d = _doctor_by_id[did] = rows[0]
+    return d
+
+## Combobox display text for a patient row
+def _patient_label(p):
+    return f"{p['id']}: {p['name']} ({p['species']}) - {p['owner_name']}"
+
+## Combobox display text for a doctor row (id, name, specialization, fee)
+def _doctor_label(d):
+    try:
+        fee_str = f"₱{float(d['fee']):,.2f}"
+    except (TypeError, ValueError):
+        fee_str = f"₱{d['fee']}"
+    spec = d['specialization'] if ('specialization' in d.keys()) else ""
+    return f"{d['id']}: {d['name']} — {spec} — {fee_str}"
+
 ## Build and display the appointments UI view (calendar + form + list)
 def show_appointments_view(parent):
     """
@@ -45,6 +162,8 @@ def show_appointments_view(parent):
     """
     for w in parent.winfo_children():
         w.destroy()
+    # other modules update appointments too, so every fresh view starts uncached
+    invalidate_appointment_cache()
 
     module_scale = 5
     ## Font helper: scale fonts for this module
@@ -96,11 +215,13 @@ def show_appointments_view(parent):
                 calendar.calevent_remove(ev)
         except Exception:
             pass
-        # query distinct appointment dates (exclude cancelled)
-        rows = db.query("SELECT DISTINCT date FROM appointments WHERE status<>?", ('cancelled',))
-        for r in rows:
+        # distinct appointment dates (exclude cancelled), queried once per cache lifetime
+        if _marked_dates[0] is None:
+            rows = db.query("SELECT DISTINCT date FROM appointments WHERE status<>?", ('cancelled',))
+            _marked_dates[0] = [r['date'] for r in rows]
+        for date_str in _marked_dates[0]:
             try:
-                d = datetime.strptime(r['date'], '%Y-%m-%d').date()
+                d = datetime.strptime(date_str, '%Y-%m-%d').date()
                 calendar.calevent_create(d, 'appt', 'appt')
             except Exception:
                 continue
@@ -119,6 +240,8 @@ def show_appointments_view(parent):
     # Scrollable container for appointment cards
     apt_container = ctk.CTkScrollableFrame(left, fg_color="transparent")
     apt_container.pack(fill="both", expand=True, padx=15, pady=(0,15))
+    # cards are gridded into one stretching column (a fixed row per card)
+    apt_container.grid_columnconfigure(0, weight=1)
 
     selected_date = [datetime.now().strftime('%Y-%m-%d')]
     selected_apt = [None]
@@ -127,24 +250,17 @@ def show_appointments_view(parent):
     ## Load appointment details into the form for editing
     def edit_appointment(aid):
         try:
-            apt = db.query("SELECT * FROM appointments WHERE id=?", (aid,))
+            apt = db.query("SELECT patient_id, doctor_id, time, status, notes FROM appointments WHERE id=?", (aid,))
             if not apt:
                 return
             apt = apt[0]
             selected_apt[0] = aid
-            p = db.query("SELECT * FROM patients WHERE id=?", (apt['patient_id'],))
+            p = _lookup_patient(apt['patient_id'])
             if p:
-                p = p[0]
-                patient_var.set(f"{p['id']}: {p['name']} ({p['species']}) - {p['owner_name']}")
-            d = db.query("SELECT * FROM doctors WHERE id=?", (apt['doctor_id'],))
+                patient_var.set(_patient_label(p))
+            d = _lookup_doctor(apt['doctor_id'])
             if d:
-                d = d[0]
-                try:
-                    fee_str = f"₱{float(d['fee']):,.2f}"
-                except Exception:
-                    fee_str = f"₱{d['fee']}"
-                spec = d['specialization'] if ('specialization' in d.keys()) else ""
-                doctor_var.set(f"{d['id']}: {d['name']} — {spec} — {fee_str}")
+                doctor_var.set(_doctor_label(d))
             time_var.set(apt['time'])
             status_var.set(apt['status'])
             notes_text.delete("1.0", "end")
@@ -156,21 +272,74 @@ def show_appointments_view(parent):
         except Exception:
             pass
 
+    # appointment card (CTkFrame) -> its rendered row, so a click needs no DB read
+    card_apts = {}
+
+    ## Handle user clicking an appointment card (select and populate form)
+    def on_card_click(e):
+        # the click may land on any inner widget of a card; walk up to the card
+        card_ref = e.widget
+        while card_ref is not None and card_ref not in card_apts:
+            card_ref = getattr(card_ref, 'master', None)
+        if card_ref is None:
+            return
+        a = card_apts[card_ref]
+        aid = a['id']
+        # un-highlight the previous card only if it survived the last refresh
+        prev = selected_card_apt[0]
+        if prev is not None and prev != card_ref and prev.winfo_exists():
+            prev.configure(fg_color="#f8f9fa")
+        # rows may be missing columns or hold bad dates
+        try:
+            card_ref.configure(fg_color="#e8f8f5")
+            selected_card_apt[0] = card_ref
+            selected_apt[0] = aid
+            selected_date[0] = a['date']
+            calendar.selection_set(datetime.strptime(a['date'], '%Y-%m-%d').date())
+
+            p = _lookup_patient(a['patient_id'])
+            if p:
+                val = _patient_label(p)
+                patient_var.set(val)
+                patient_entry.delete(0, "end")
+                patient_entry.insert(0, val)
+            d = _lookup_doctor(a['doctor_id'])
+            if d:
+                dval = _doctor_label(d)
+                doctor_var.set(dval)
+                doctor_dd.set(dval)
+            time_var.set(a['time'])
+            time_dd.set(a['time'])
+            status_var.set(a['status'])
+            status_dd.set(a['status'])
+            notes_text.delete("1.0", "end")
+            notes_text.insert("1.0", a['notes'] or "")
+            selected_apt_label.configure(text=f"Selected Appointment ID: {aid}")
+            delete_btn.configure(state="normal")
+        except (tk.TclError, KeyError, IndexError, TypeError, ValueError):
+            pass
+
+    apt_container.bind_class(_CARD_TAG, "<Button-1>", on_card_click)
+
     ## Load and render appointment cards for given date
     def load_appointments(date_str):
         # clear container
         for w in apt_container.winfo_children():
             w.destroy()
-        apts = db.query("""
-            SELECT a.id, a.date, a.time, a.status, a.notes,
-                   p.id as patient_id, p.name as patient_name, p.species,
-                   d.id as doctor_id, d.name as doctor_name, d.specialization, d.fee
-            FROM appointments a
-            JOIN patients p ON a.patient_id = p.id
-            JOIN doctors d ON a.doctor_id = d.id
-            WHERE a.date = ?
-            ORDER BY a.time
-        """, (date_str,))
+        card_apts.clear()
+        selected_card_apt[0] = None
+        apts = _date_apts_cache.get(date_str)
+        if apts is None:
+            apts = _date_apts_cache[date_str] = db.query("""
+                SELECT a.id, a.date, a.time, a.status, a.notes,
+                       p.id as patient_id, p.name as patient_name, p.species,
+                       d.id as doctor_id, d.name as doctor_name, d.specialization, d.fee
+                FROM appointments a
+                JOIN patients p ON a.patient_id = p.id
+                JOIN doctors d ON a.doctor_id = d.id
+                WHERE a.date = ?
+                ORDER BY a.time
+            """, (date_str,))
         # render appointment cards
         if apts:
             for i, apt in enumerate(apts, 1):
@@ -180,7 +349,7 @@ def show_appointments_view(parent):
                     fee_str = f"₱{apt['fee']}"
 
                 card = ctk.CTkFrame(apt_container, fg_color="#f8f9fa", corner_radius=8, border_width=1, border_color="#e0e0e0")
-                card.pack(fill="x", padx=10, pady=6)
+                card.grid(row=i, column=0, sticky="ew", padx=10, pady=6)
 
                 header_text = f"[{i}] {format_time_12h(apt['time'])} — {apt['patient_name']} ({apt['species']})"
                 ctk.CTkLabel(card, text=header_text, font=F(13, "bold"), anchor="w").grid(row=0, column=0, sticky="w", padx=10, pady=(8,2))
@@ -191,94 +360,11 @@ def show_appointments_view(parent):
                 if apt['notes']:
                     ctk.CTkLabel(card, text=f"Notes: {apt['notes']}", font=F(11), anchor="w", wraplength=480 + module_scale * 8).grid(row=2, column=0, columnspan=2, sticky="w", padx=10, pady=(6,8))
 
-                ## Handle user clicking an appointment card (select and populate form)
-                def on_card_click(e=None, aid=apt['id'], card_ref=card):
-                    try:
-                        if selected_card_apt[0] and selected_card_apt[0] != card_ref:
-                            selected_card_apt[0].configure(fg_color="#f8f9fa")
-                    except Exception:
-                        pass
-                    try:
-                        card_ref.configure(fg_color="#e8f8f5")
-                    except Exception:
-                        pass
-                    selected_card_apt[0] = card_ref
-                    try:
-                        row = db.query("SELECT * FROM appointments WHERE id=?", (aid,))
-                        if not row:
-                            return
-                        a = row[0]
-                        selected_apt[0] = aid
-                        try:
-                            selected_date[0] = a['date']
-                            try:
-                                calendar.selection_set(datetime.strptime(a['date'], '%Y-%m-%d').date())
-                            except Exception:
-                                pass
-                        except Exception:
-                            pass
-
-                        p = db.query("SELECT * FROM patients WHERE id=?", (a['patient_id'],))
-                        if p:
-                            p = p[0]
-                            val = f"{p['id']}: {p['name']} ({p['species']}) - {p['owner_name']}"
-                            try:
-                                patient_var.set(val)
-                                patient_entry.delete(0, "end")
-                                patient_entry.insert(0, val)
-                            except Exception:
-                                pass
-                        d = db.query("SELECT * FROM doctors WHERE id=?", (a['doctor_id'],))
-                        if d:
-                            d = d[0]
-                            try:
-                                fee_str = f"₱{float(d['fee']):,.2f}"
-                            except Exception:
-                                fee_str = f"₱{d['fee']}"
-                            spec = d['specialization'] if ('specialization' in d.keys()) else ""
-                            dval = f"{d['id']}: {d['name']} — {spec} — {fee_str}"
-                            try:
-                                doctor_var.set(dval)
-                            except Exception:
-                                pass
-                            try:
-                                doctor_dd.set(dval)
-                            except Exception:
-                                pass
-                        try:
-                            time_var.set(a['time'])
-                        except Exception:
-                            pass
-                        try:
-                            time_dd.set(a['time'])
-                        except Exception:
-                            pass
-                        try:
-                            status_var.set(a['status'])
-                        except Exception:
-                            pass
-                        try:
-                            status_dd.set(a['status'])
-                        except Exception:
-                            pass
-                        notes_text.delete("1.0", "end")
-                        notes_text.insert("1.0", a['notes'] or "")
-                        try:
-                            selected_apt_label.configure(text=f"Selected Appointment ID: {aid}")
-                        except Exception:
-                            pass
-                        try:
-                            delete_btn.configure(state="normal")
-                        except Exception:
-                            pass
-                    except Exception:
-                        pass
-
-                card.bind("<Button-1>", on_card_click)
-                for child in card.winfo_children():
-                    child.bind("<Button-1>", on_card_click)
+                # opt the card and every inner widget into the shared click binding
+                _add_bindtag(card, _CARD_TAG)
+                card_apts[card] = apt
         else:
-            ctk.CTkLabel(apt_container, text=f"No appointments scheduled for {date_str}", font=F(12)).pack(padx=10, pady=10)
+            ctk.CTkLabel(apt_container, text=f"No appointments scheduled for {date_str}", font=F(12)).grid(row=0, column=0, padx=10, pady=10)
 
     ## Handle calendar date selection and refresh appointment list
     def on_date_select(event):
@@ -341,8 +427,10 @@ def show_appointments_view(parent):
     ctk.CTkLabel(form_container, text="Patient:", 
                 font=F(13, "bold"),
                 text_color="#2c3e50").pack(anchor="w", padx=10, pady=(15,5))
-    patients = db.query("SELECT * FROM patients WHERE is_deleted=0 ORDER BY id ASC")
-    patient_options = [f"{p['id']}: {p['name']} ({p['species']}) - {p['owner_name']}" for p in patients]
+    patients = db.query(f"SELECT {_PATIENT_COLUMNS} FROM patients WHERE is_deleted=0 ORDER BY id ASC")
+    _patient_by_id.clear()
+    _patient_by_id.update((p['id'], p) for p in patients)
+    patient_options = [_patient_label(p) for p in patients]
     patient_var = ctk.StringVar(value=patient_options[0] if patient_options else "")
     
     # Create a searchable patient selector with scrollable list
@@ -399,15 +487,10 @@ def show_appointments_view(parent):
     ctk.CTkLabel(form_container, text="Doctor:", 
                 font=F(13, "bold"),
                 text_color="#2c3e50").pack(anchor="w", padx=10, pady=(10,5))
-    doctors = db.query("SELECT * FROM doctors ORDER BY id ASC")
-    doctor_options = []
-    for d in doctors:
-        try:
-            fee_str = f"₱{float(d['fee']):,.2f}"
-        except Exception:
-            fee_str = f"₱{d['fee']}"
-        spec = d['specialization'] if ('specialization' in d.keys()) else ""
-        doctor_options.append(f"{d['id']}: {d['name']} — {spec} — {fee_str}")
+    doctors = db.query(f"SELECT {_DOCTOR_COLUMNS} FROM doctors ORDER BY id ASC")
+    _doctor_by_id.clear()
+    _doctor_by_id.update((d['id'], d) for d in doctors)
+    doctor_options = [_doctor_label(d) for d in doctors]
     doctor_var = ctk.StringVar(value=doctor_options[0] if doctor_options else "")
     doctor_dd = ctk.CTkComboBox(form_container, variable=doctor_var, values=doctor_options,
                                 state="readonly", height=34 + module_scale, font=F(11),
@@ -465,109 +548,81 @@ def show_appointments_view(parent):
                 except Exception:
                     return ""
 
-            # robust ID parsing: handle values like "3: Name (...) - Owner" or plain ids
-            ## Parse an identifier from a combobox display string
-            def parse_id(value):
-                if not value:
-                    return ""
-                v = str(value)
-                try:
-                    # if the value contains a colon, the id is before it
-                    if ":" in v:
-                        return v.split(":")[0].strip()
-                    return v.strip()
-                except Exception:
-                    return v
-
-            # normalize time into 24-hour "HH:MM" for storage and comparisons
-            ## Normalize time strings into 24-hour HH:MM format for storage
-            def normalize_time(t):
-                """Convert time string to 24-hour HH:MM format for storage"""
-                try:
-                    # Handle both 12h and 24h formats
-                    if "AM" in t.upper() or "PM" in t.upper():
-                        dt = datetime.strptime(t.upper(), "%I:%M %p")
-                    else:
-                        dt = datetime.strptime(t, "%H:%M")
-                    return dt.strftime("%H:%M")
-                except Exception:
-                    return t
-
             patient_raw = safe_get(patient_entry, patient_var)
             doctor_raw = safe_get(doctor_dd, doctor_var)
-            patient_id = parse_id(patient_raw)
-            doctor_id = parse_id(doctor_raw)
+            pid = _parse_id(patient_raw)
+            did = _parse_id(doctor_raw)
             time_raw = safe_get(time_dd, time_var)  # Get time from combobox directly
             time_selected = normalize_time(time_raw)
             status_selected = safe_get(status_dd, status_var)  # Get status from combobox directly
             notes = notes_text.get("1.0", "end").strip()
 
-            import uuid
-            apt_id = str(uuid.uuid4())[:8]
-
-            # Coerce numeric ids when possible for DB operations
-            try:
-                did = int(doctor_id)
-            except Exception:
-                did = doctor_id
-
-            try:
-                pid = int(patient_id)
-            except Exception:
-                pid = patient_id
-
-            # Query for conflicting appointments - check BOTH doctor and patient with normalized time
-            conflict_check = db.query("""
-                SELECT * FROM appointments 
-                WHERE (doctor_id=? OR patient_id=?) 
-                AND date=? AND time=? AND status<>'cancelled'
-            """, (did, pid, selected_date[0], time_selected))
-
-            if conflict_check:
-                # If we're editing and it's the same appointment, allow it
-                if not selected_apt[0] or selected_apt[0] != conflict_check[0]['id']:
-                    conflicted_apt = conflict_check[0]
-                    conflicted_entity = "Doctor" if str(conflicted_apt['doctor_id']) == str(did) else "Patient"
-                    messagebox.showerror("Schedule Conflict", 
-                        f"{conflicted_entity} already has an appointment at {time_raw} on {selected_date[0]}")
-                    return
+            apt_id = secrets.token_hex(4)
 
             # If an appointment is selected, update that row. Otherwise insert a new appointment.
             if selected_apt[0]:
-                db.execute("""
+                write_sql = """
                     UPDATE appointments SET patient_id=?, doctor_id=?, date=?, time=?, status=?, notes=? WHERE id=?
-                """, (pid, did, selected_date[0], time_selected, status_selected, notes, selected_apt[0]))
+                """
+                write_params = (pid, did, selected_date[0], time_selected, status_selected, notes, selected_apt[0])
                 read_id = selected_apt[0]
             else:
-                db.execute("""
+                write_sql = """
                     INSERT INTO appointments (id, patient_id, doctor_id, date, time, status, notes)
                     VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (apt_id, pid, did, selected_date[0], time_selected, status_selected, notes))
+                """
+                write_params = (apt_id, pid, did, selected_date[0], time_selected, status_selected, notes)
                 read_id = apt_id
 
-            # After write, verify by re-reading the saved row. If direct id lookup fails, fallback to selecting by unique fields.
+            # Conflict check, write and read-back run in one transaction so no other
+            # writer can slip a clashing appointment in between them.
+            saved = []
+            written = 0
+            with db.transaction() as conn:
+                # check BOTH doctor and patient with normalized time, ignoring the row being edited;
+                # one equality seek per entity (UNION ALL) instead of an OR that forces a scan
+                slot = (selected_date[0], time_selected, selected_apt[0] or "")
+                conflicted_apt = conn.execute("""
+                    SELECT id, patient_id, doctor_id FROM appointments
+                    WHERE doctor_id=? AND date=? AND time=? AND status<>'cancelled' AND id<>?
+                    UNION ALL
+                    SELECT id, patient_id, doctor_id FROM appointments
+                    WHERE patient_id=? AND date=? AND time=? AND status<>'cancelled' AND id<>?
+                    LIMIT 1
+                """, (did,) + slot + (pid,) + slot).fetchone()
+                if conflicted_apt is None and not _VERIFY_SAVES:
+                    written = conn.execute(write_sql, write_params).rowcount
+                elif conflicted_apt is None:
+                    # On SQLite >= 3.35 the write hands back the saved row itself
+                    if SUPPORTS_RETURNING:
+                        saved = conn.execute(write_sql + " RETURNING " + _APT_COLUMNS, write_params).fetchall()
+                    else:
+                        conn.execute(write_sql, write_params)
+                        saved = conn.execute(_APT_READBACK_SQL, (read_id,)).fetchall()
+
+            if conflicted_apt is not None:
+                conflicted_entity = "Doctor" if str(conflicted_apt['doctor_id']) == str(did) else "Patient"
+                messagebox.showerror("Schedule Conflict",
+                    f"{conflicted_entity} already has an appointment at {time_raw} on {selected_date[0]}")
+                return
+            invalidate_appointment_cache()
+
             try:
-                saved = db.query("SELECT * FROM appointments WHERE id=?", (read_id,))
-                if not saved or len(saved) == 0:
-                    # fallback: find by date/time/patient/doctor (new row)
-                    fallback = db.query("""
-                        SELECT * FROM appointments
-                        WHERE date=? AND time=? AND patient_id=? AND doctor_id=?
-                        ORDER BY rowid DESC LIMIT 1
-                    """, (selected_date[0], time_selected, pid, did))
-                    if fallback and len(fallback) > 0:
-                        saved = fallback
-
-                if saved and len(saved) > 0:
+                if not _VERIFY_SAVES:
+                    if written:
+                        messagebox.showinfo("✅ Success", "Appointment saved!")
+                    else:
+                        messagebox.showwarning("Warning", "Appointment no longer exists; nothing was saved.")
+                elif saved:
                     s = saved[0]
                     # canonicalize and compare
-                    saved_pid = s.get('patient_id')
-                    saved_did = s.get('doctor_id')
-                    saved_time = s.get('time')
+                    saved_pid = s['patient_id']
+                    saved_did = s['doctor_id']
+                    saved_time = s['time']
                     try:
-                        ok = (str(int(saved_pid)) == str(int(pid))) and (str(int(saved_did)) == str(int(did))) and (saved_time == time_selected)
-                    except Exception:
-                        ok = (str(saved_pid) == str(pid)) and (str(saved_did) == str(did)) and (saved_time == time_selected)
+                        ok = (int(saved_pid) == int(pid)) and (int(saved_did) == int(did)) and (saved_time == time_selected)
+                    except (TypeError, ValueError):
+                        ok = (saved_pid == pid) and (saved_did == did) and (saved_time == time_selected)
 
                     if ok:
                         messagebox.showinfo("✅ Success", "Appointment saved and verified!")
@@ -578,12 +633,12 @@ def show_appointments_view(parent):
             except Exception:
                 pass
 
+            # clear_selection() already reloads the list for the reset date
             clear_selection()
             try:
                 refresh_calendar_marks()
             except Exception:
                 pass
-            load_appointments(selected_date[0])
         except Exception as e:
             messagebox.showerror("Error", str(e))
     
@@ -610,9 +665,14 @@ def show_appointments_view(parent):
                 return
             if messagebox.askyesno("Confirm Cancellation", "Are you sure you want to cancel this appointment?"):
                 db.execute("UPDATE appointments SET status=? WHERE id=?", ("cancelled", selected_apt[0]))
+                invalidate_appointment_cache()
                 messagebox.showinfo("Success", "Appointment cancelled successfully!")
+                # clear_selection() already reloads the list for the reset date
                 clear_selection()
-                load_appointments(selected_date[0])
+                try:
+                    refresh_calendar_marks()
+                except Exception:
+                    pass
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
@@ -624,13 +684,14 @@ def show_appointments_view(parent):
                 return
             if messagebox.askyesno("Confirm Delete", "This will permanently delete the appointment. Continue?"):
                 db.execute("DELETE FROM appointments WHERE id=?", (selected_apt[0],))
+                invalidate_appointment_cache()
                 messagebox.showinfo("Success", "Appointment deleted successfully!")
+                # clear_selection() already reloads the list for the reset date
                 clear_selection()
                 try:
                     refresh_calendar_marks()
                 except Exception:
                     pass
-                load_appointments(selected_date[0])
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
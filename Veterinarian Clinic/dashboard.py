@@ -2,68 +2,121 @@
 CLASS : 2
 
 """
+import calendar
+import time
 import customtkinter as ctk
-from datetime import datetime, timedelta
+from datetime import datetime
 
 app = None
 db = None
 refs = {}
 
+# small scale increase for this module
+_MODULE_SCALE = 4
+
+## Font helper for dashboard module
+def _font(size, weight=None):
+    s = int(size + _MODULE_SCALE)
+    return ("Arial", s, weight) if weight else ("Arial", s)
+
+# Font tuples built once and shared by every render
+_F_TITLE = _font(32, "bold")
+_F_SECTION = _font(20, "bold")
+_F_SUBSECTION = _font(16, "bold")
+_F_STAT_VALUE = _font(36, "bold")
+_F_LABEL = _font(14)
+_F_BODY = _font(12)
+
+# The DashboardView currently on screen, reused while its widgets are still alive
+_dashboard_instance = None
+
+# Month names for the navigation label (static lookup instead of strftime('%B'))
+_MONTHS = ('January', 'February', 'March', 'April', 'May', 'June',
+           'July', 'August', 'September', 'October', 'November', 'December')
+
+# Appointment status -> (icon, display label); unknown statuses fall back to ❌
+_STATUS_ICONS = {
+    'completed': ('✅', 'COMPLETED'),
+    'scheduled': ('🔔', 'SCHEDULED'),
+    'cancelled': ('❌', 'CANCELLED'),
+}
+
+
+# [monotonic time computed, YYYY-MM-DD] for _today_str
+_today_cache = [None, '']
+
+## Today's date as YYYY-MM-DD, reused for up to a second (f-string is cheaper than strftime);
+## the short window keeps the date at most a second late after midnight
+def _today_str():
+    stamp = time.monotonic()
+    if _today_cache[0] is None or stamp - _today_cache[0] >= 1:
+        now = datetime.now()
+        _today_cache[0] = stamp
+        _today_cache[1] = f"{now.year:04d}-{now.month:02d}-{now.day:02d}"
+    return _today_cache[1]
+
+## Replace the text of a read-only list textbox. Tk only lays out the lines in
+## view, so long lists need no lazy rendering of their own.
+def _fill_readonly(box, text):
+    # unchanged content (e.g. a refresh with no new data): keep scroll position, skip redraw
+    if box.get("1.0", "end-1c") == text:
+        return
+    box.configure(state="normal")
+    box.delete("1.0", "end")
+    box.insert("1.0", text)
+    box.configure(state="disabled")
+
+## Update a label in place, only when its text actually changes
+def _set_label(label, text):
+    if label.cget("text") != text:
+        label.configure(text=text)
+
 
 ## Dashboard data accessors and helpers
 class Dashboard:
-    ## Return total number of patients
-    def get_patient_count(self):
-        try:
-            return len(db.query("SELECT * FROM patients WHERE is_deleted=0"))
-        except Exception:
-            return 0
-
-    ## Return count of today's non-cancelled appointments
-    def get_today_appointments_count(self):
+    ## Return (patients, today's appointments, doctors) counts in one query
+    def get_counts(self, today=None):
         try:
-            return len(db.query(
-                "SELECT * FROM appointments WHERE date=? AND status<>?", 
-                (datetime.now().strftime('%Y-%m-%d'), 'cancelled')
-            ))
+            row = db.query("""
+                SELECT (SELECT COUNT(*) FROM patients WHERE is_deleted=0) AS patients,
+                       (SELECT COUNT(*) FROM appointments WHERE date=? AND status<>'cancelled') AS today_apts,
+                       (SELECT COUNT(*) FROM doctors) AS doctors
+            """, (today or _today_str(),))[0]
+            return row['patients'], row['today_apts'], row['doctors']
         except Exception:
-            return 0
+            return 0, 0, 0
 
-    ## Return total number of doctors
-    def get_doctor_count(self):
+    ## List appointments for today with patient and doctor info, as tuples of
+    ## (time, status, notes, patient_name, patient_species, doctor_name, doctor_specialization)
+    def list_today_appointments(self, today=None):
         try:
-            return len(db.query("SELECT * FROM doctors"))
-        except Exception:
-            return 0
-
-    ## List appointments for today with patient and doctor info
-    def list_today_appointments(self):
-        try:
-            return db.query("""
-                SELECT a.*, p.name as patient_name, d.name as doctor_name, p.species as patient_species, d.specialization as doctor_specialization
+            return db.query_tuples("""
+                SELECT a.time, a.status, COALESCE(a.notes, ''),
+                       p.name, COALESCE(p.species, ''),
+                       d.name, COALESCE(d.specialization, '')
                 FROM appointments a
                 JOIN patients p ON a.patient_id = p.id
                 JOIN doctors d ON a.doctor_id = d.id
                 WHERE a.date = ?
                 ORDER BY a.time
-            """, (datetime.now().strftime('%Y-%m-%d'),))
+            """, (today or _today_str(),))
         except Exception:
             return []
 
+    ## Return ((patients, today's appointments, doctors), today's appointment rows) for one render
+    def load(self, today=None):
+        today = today or _today_str()
+        return self.get_counts(today), self.list_today_appointments(today)
+
     ## Get completed appointments for a given month
     def get_completed_appointments_for_month(self, year, month):
         try:
-            start_dt = datetime(year, month, 1)
-            if month == 12:
-                next_month_dt = datetime(year + 1, 1, 1)
-            else:
-                next_month_dt = datetime(year, month + 1, 1)
-            end_dt = next_month_dt - timedelta(days=1)
-            start = start_dt.strftime('%Y-%m-%d')
-            end = end_dt.strftime('%Y-%m-%d')
+            start = f"{year:04d}-{month:02d}-01"
+            end = f"{year:04d}-{month:02d}-{calendar.monthrange(year, month)[1]:02d}"
             return db.query(
                 """
-                SELECT a.*, p.name as patient_name, d.name as doctor_name, p.species as patient_species, d.specialization as doctor_specialization
+                SELECT COALESCE(a.date, '') AS date, COALESCE(a.time, '') AS time,
+                       COALESCE(p.name, '') AS patient_name, COALESCE(d.name, '') AS doctor_name
                 FROM appointments a
                 JOIN patients p ON a.patient_id = p.id
                 JOIN doctors d ON a.doctor_id = d.id
@@ -86,127 +139,151 @@ class DashboardView:
         self.current_month = now.month
         self.build_ui()
 
-    ## Construct UI elements for the dashboard
+    ## Construct UI elements for the dashboard; data is filled in once Tk is idle
     def build_ui(self):
         for w in self.parent.winfo_children():
             w.destroy()
 
-        # small scale increase for this module
-        module_scale = 4
-        ## Font helper for dashboard module
-        def F(size, weight=None):
-            s = int(size + module_scale)
-            return ("Arial", s, weight) if weight else ("Arial", s)
+        module_scale = _MODULE_SCALE
 
-        ctk.CTkLabel(self.parent, text="Dashboard", font=F(32, "bold"),
+        ctk.CTkLabel(self.parent, text="Dashboard", font=_F_TITLE,
                     text_color="#2c3e50").pack(pady=20 + module_scale)
 
         stats_frame = ctk.CTkFrame(self.parent, fg_color="transparent")
         stats_frame.pack(fill="x", padx=20, pady=10)
 
-        patients = self.dashboard.get_patient_count()
-        today_apts = self.dashboard.get_today_appointments_count()
-        doctors = self.dashboard.get_doctor_count()
-
-        for label, value, color in [
-            ("Patients", patients, "#3498db"),
-            ("Today's Appointments", today_apts, "#2ecc71"),
-            ("Doctors", doctors, "#e74c3c")
+        # counter value labels, filled by _populate
+        self._stat_labels = []
+        for label, color in [
+            ("Patients", "#3498db"),
+            ("Today's Appointments", "#2ecc71"),
+            ("Doctors", "#e74c3c")
         ]:
             card = ctk.CTkFrame(stats_frame, fg_color=color, corner_radius=10)
             card.pack(side="left", padx=10, expand=True, fill="both")
-            ctk.CTkLabel(card, text=label, font=F(14), 
+            ctk.CTkLabel(card, text=label, font=_F_LABEL, 
                         text_color="white").pack(pady=(10 + module_scale, 5))
-            ctk.CTkLabel(card, text=str(value), font=F(36, "bold"),
-                        text_color="white").pack(pady=(5, 10 + module_scale))
+            value_label = ctk.CTkLabel(card, text="…", font=_F_STAT_VALUE,
+                        text_color="white")
+            value_label.pack(pady=(5, 10 + module_scale))
+            self._stat_labels.append(value_label)
 
         # Monthly completed appointments section
         monthly_frame = ctk.CTkFrame(self.parent, fg_color="transparent")
         monthly_frame.pack(fill="x", padx=20, pady=(10, 0))
 
-        ## Navigate to previous month and rebuild UI
-        def prev_month():
-            m = self.current_month - 1
-            y = self.current_year
-            if m < 1:
-                m = 12
-                y -= 1
-            self.current_month = m
-            self.current_year = y
-            self.build_ui()
-
-        ## Navigate to next month and rebuild UI
-        def next_month():
-            m = self.current_month + 1
-            y = self.current_year
-            if m > 12:
-                m = 1
-                y += 1
-            self.current_month = m
-            self.current_year = y
-            self.build_ui()
-
         header_frame = ctk.CTkFrame(monthly_frame, fg_color="transparent")
         header_frame.pack(fill="x")
-        ctk.CTkLabel(header_frame, text="Monthly Completed Appointments", font=F(16, "bold")).pack(side="left")
+        ctk.CTkLabel(header_frame, text="Monthly Completed Appointments", font=_F_SUBSECTION).pack(side="left")
         nav_frame = ctk.CTkFrame(header_frame, fg_color="transparent")
         nav_frame.pack(side="right")
-        ctk.CTkButton(nav_frame, text="<", width=28, command=prev_month).pack(side="left", padx=4)
-        ctk.CTkLabel(nav_frame, text=datetime(self.current_year, self.current_month, 1).strftime('%B %Y'), font=F(12)).pack(side="left", padx=6)
-        ctk.CTkButton(nav_frame, text=">", width=28, command=next_month).pack(side="left", padx=4)
+        ctk.CTkButton(nav_frame, text="<", width=28, command=self.prev_month).pack(side="left", padx=4)
+        self._month_label = ctk.CTkLabel(nav_frame, text="", font=_F_BODY)
+        self._month_label.pack(side="left", padx=6)
+        ctk.CTkButton(nav_frame, text=">", width=28, command=self.next_month).pack(side="left", padx=4)
 
-        completed_apts = self.dashboard.get_completed_appointments_for_month(self.current_year, self.current_month)
-        count = len(completed_apts)
         count_card = ctk.CTkFrame(monthly_frame, fg_color="#34495e", corner_radius=8)
         count_card.pack(fill="x", pady=(8, 6))
-        ctk.CTkLabel(count_card, text=f"Completed this month: {count}", font=F(14), text_color="white").pack(padx=10, pady=8)
+        self._count_label = ctk.CTkLabel(count_card, text="", font=_F_LABEL, text_color="white")
+        self._count_label.pack(padx=10, pady=8)
 
-        monthly_list = ctk.CTkScrollableFrame(self.parent, fg_color="transparent", height=120)
-        monthly_list.pack(fill="x", padx=20, pady=(0, 10))
-        if completed_apts:
-            for apt in completed_apts:
-                card = ctk.CTkFrame(monthly_list, fg_color="#f6f8fa", corner_radius=6, border_width=1, border_color="#e0e0e0")
-                card.pack(fill="x", padx=6, pady=4)
-                date_text = apt['date'] if apt['date'] is not None else ''
-                time_text = apt['time'] if apt['time'] is not None else ''
-                patient = apt['patient_name'] if apt['patient_name'] is not None else ''
-                doctor = apt['doctor_name'] if apt['doctor_name'] is not None else ''
-                header = f"{date_text} {time_text} — {patient}"
-                ctk.CTkLabel(card, text=header, font=F(12, "bold"), anchor="w").pack(fill="x", padx=8, pady=(6,2))
-                ctk.CTkLabel(card, text=f"Doctor: {doctor}", font=F(11), anchor="w").pack(fill="x", padx=8, pady=(0,6))
-        else:
-            ctk.CTkLabel(monthly_list, text="No completed appointments this month.", font=F(12)).pack(padx=10, pady=8)
+        # read-only textbox: Tk lays out only the visible lines, so a busy month
+        # costs no per-row widgets
+        self._monthly_list = ctk.CTkTextbox(self.parent, height=120, font=_F_BODY, wrap="none",
+                                            fg_color="#f6f8fa", border_width=1, border_color="#e0e0e0")
+        self._monthly_list.pack(fill="x", padx=20, pady=(0, 10))
 
         ctk.CTkLabel(self.parent, text="Today's Appointments", 
-                    font=F(20, "bold")).pack(pady=(20 + module_scale, 10))
-
-        appt_list_container = ctk.CTkScrollableFrame(self.parent, fg_color="transparent")
-        appt_list_container.pack(fill="both", expand=True, padx=20, pady=10)
-
-        apts = self.dashboard.list_today_appointments()
+                    font=_F_SECTION).pack(pady=(20 + module_scale, 10))
+
+        # one read-only textbox instead of a frame and 3-4 labels per appointment
+        self._appt_list = ctk.CTkTextbox(self.parent, font=_F_BODY, wrap="word",
+                                         fg_color="#f8f9fa", border_width=1, border_color="#e0e0e0")
+        self._appt_list.pack(fill="both", expand=True, padx=20, pady=10)
+
+        # draw the empty layout first; the queries run from the idle callback
+        self.parent.after_idle(self._populate)
+
+    ## Re-run the queries into the existing widgets (no widget rebuild)
+    def refresh(self):
+        self._populate()
+
+    ## True while this view's widgets are still on screen in `parent`
+    def is_alive(self, parent):
+        return self.parent is parent and self._appt_list.winfo_exists()
+
+    ## Run the dashboard queries and fill counters, monthly section and today's list
+    def _populate(self):
+        # the view may have been replaced before the idle callback ran
+        if not self._appt_list.winfo_exists():
+            return
+        # one date string shared by every "today" query in this render
+        (patients, today_apts, doctors), apts = self.dashboard.load(_today_str())
+        for value_label, value in zip(self._stat_labels, (patients, today_apts, doctors)):
+            _set_label(value_label, str(value))
+        self._refresh_monthly()
 
         if apts:
-            for apt in apts:
-                card = ctk.CTkFrame(appt_list_container, fg_color="#f8f9fa", corner_radius=8, border_width=1, border_color="#e0e0e0")
-                card.pack(fill="x", padx=6, pady=6)
-
-                patient_species = apt['patient_species'] if apt['patient_species'] is not None else ''
-                header = f"{apt['time']} — {apt['patient_name']} ({patient_species})"
-                ctk.CTkLabel(card, text=header, font=F(13, "bold"), anchor="w").grid(row=0, column=0, sticky="w", padx=10 + module_scale, pady=(8,2))
+            lines = []
+            for apt_time, status, notes, patient_name, patient_species, doctor_name, doctor_spec in apts:
+                icon, label = _STATUS_ICONS.get(status) or ('❌', status.upper())
+                lines.append(f"{apt_time} — {patient_name} ({patient_species})    {icon} {label}")
+                lines.append(f"    Doctor: {doctor_name} ({doctor_spec})")
+
+                if notes:
+                    lines.append(f"    Notes: {notes}")
+                lines.append("")
+            _fill_readonly(self._appt_list, "\n".join(lines))
+        else:
+            _fill_readonly(self._appt_list, "No appointments today.")
 
-                doctor_spec = apt['doctor_specialization'] if apt['doctor_specialization'] is not None else ''
-                doctor_text = f"{apt['doctor_name']} ({doctor_spec})"
-                ctk.CTkLabel(card, text=f"Doctor: {doctor_text}", font=F(11), anchor="w").grid(row=1, column=0, sticky="w", padx=10 + module_scale)
+    ## Re-render only the monthly section (label, count, list) for the current month
+    def _refresh_monthly(self):
+        _set_label(self._month_label, f"{_MONTHS[self.current_month - 1]} {self.current_year}")
 
-                status_icon = "✅" if apt['status'] == 'completed' else "🔔" if apt['status'] == 'scheduled' else "❌"
-                ctk.CTkLabel(card, text=f"{status_icon} {apt['status'].upper()}", font=F(11), anchor="e").grid(row=0, column=1, sticky="e", padx=10 + module_scale, pady=(8,2))
+        completed_apts = self.dashboard.get_completed_appointments_for_month(self.current_year, self.current_month)
+        _set_label(self._count_label, f"Completed this month: {len(completed_apts)}")
 
-                if apt['notes']:
-                    ctk.CTkLabel(card, text=f"Notes: {apt['notes']}", font=F(11), anchor="w", wraplength=720 + module_scale * 20).grid(row=2, column=0, columnspan=2, sticky="w", padx=10 + module_scale, pady=(6,8))
+        if completed_apts:
+            lines = []
+            for apt in completed_apts:
+                lines.append(f"{apt['date']} {apt['time']} — {apt['patient_name']}")
+                lines.append(f"    Doctor: {apt['doctor_name']}")
+            text = "\n".join(lines)
         else:
-            ctk.CTkLabel(appt_list_container, text="No appointments today.", font=F(12)).pack(padx=10, pady=10)
+            text = "No completed appointments this month."
+
+        _fill_readonly(self._monthly_list, text)
+
+    ## Navigate to previous month and refresh the monthly section
+    def prev_month(self):
+        m = self.current_month - 1
+        y = self.current_year
+        if m < 1:
+            m = 12
+            y -= 1
+        self.current_month = m
+        self.current_year = y
+        self._refresh_monthly()
+
+    ## Navigate to next month and refresh the monthly section
+    def next_month(self):
+        m = self.current_month + 1
+        y = self.current_year
+        if m > 12:
+            m = 1
+            y += 1
+        self.current_month = m
+        self.current_year = y
+        self._refresh_monthly()
 
 
 ## Show the dashboard view in the provided parent container
 def show_dashboard_view(parent):
-    DashboardView(parent)
+    global _dashboard_instance
+    # other views clear the content frame, so reuse only works while the
+    # dashboard is still displayed; otherwise build a fresh one
+    if _dashboard_instance is not None and _dashboard_instance.is_alive(parent):
+        _dashboard_instance.refresh()
+    else:
+        _dashboard_instance = DashboardView(parent)
@@ -1,31 +1,98 @@
 """
 CLASS: 1
 """
+import atexit
 import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
 
 DB_FILE = Path(__file__).with_name('vet_clinic.db')
 
+# UPDATE/INSERT ... RETURNING needs SQLite 3.35+
+SUPPORTS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+## Probe whether this SQLite build has FTS5 with the trigram tokenizer (3.34+)
+def _fts_trigram_available():
+    conn = sqlite3.connect(':memory:')
+    try:
+        conn.execute("CREATE VIRTUAL TABLE t USING fts5(x, tokenize='trigram')")
+        return True
+    except sqlite3.Error:
+        return False
+    finally:
+        conn.close()
+
+# patients_fts (substring search over patient/owner names) is only built when supported
+SUPPORTS_FTS = _fts_trigram_available()
+
+# Stored in PRAGMA user_version once _setup_tables has run; bump it whenever the
+# schema, migrations or seed data below change so existing databases re-run setup
+SCHEMA_VERSION = 8
+
 ## Lightweight SQLite database wrapper used across modules
 class Database:
     _conn = None
+    # serializes opening the shared connection and every write + commit pair, so a
+    # background thread can't commit (or roll back) in the middle of another's work
+    _lock = threading.RLock()
+    # background reader for query_async: a single worker thread, so queries finish in the
+    # order submitted, with its own read-only connection (WAL lets it read during writes)
+    _reader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-reader")
+    _reader_conn = None  # only ever touched on the reader thread
     
     ## Obtain a singleton DB connection, initializing schema if needed
     @classmethod
     def get_connection(cls):
         if cls._conn is None:
-            cls._conn = sqlite3.connect(str(DB_FILE))
-            cls._conn.row_factory = sqlite3.Row
-            cls._setup_tables()
+            with cls._lock:
+                if cls._conn is None:
+                    cls._conn = cls._open()
         return cls._conn
+
+    @classmethod
+    ## Internal: open a connection and run schema setup; only published once ready
+    def _open(cls):
+        # larger statement cache: every helper goes through Connection.execute,
+        # so repeated SQL text reuses its prepared statement; the connection is
+        # shared by every thread (sqlite serializes calls on it internally).
+        # URI form (mode=rwc: read/write, create if missing) keeps the path properly escaped.
+        uri = Path(DB_FILE).resolve().as_uri() + "?mode=rwc"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False, cached_statements=256)
+        conn.row_factory = sqlite3.Row
+        # WAL + NORMAL sync: readers never block on the writer and commits skip
+        # the extra fsync; keep temp tables in memory, ~20 MB page cache, 256 MB mmap.
+        # All of these are applied on every open, before any schema work.
+        conn.executescript('''
+            PRAGMA foreign_keys = ON;
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            PRAGMA temp_store = MEMORY;
+            PRAGMA cache_size = -20000;
+            PRAGMA mmap_size = 268435456;
+        ''')
+        try:
+            cls._setup_tables(conn)
+        except Exception:
+            # don't leave a half-initialized connection (or open setup transaction) behind
+            conn.rollback()
+            conn.close()
+            raise
+        return conn
     
     @classmethod
     ## Internal: create required tables and perform simple migrations
-    def _setup_tables(cls):
-        cur = cls._conn.cursor()
+    def _setup_tables(cls, conn):
+        cur = conn.cursor()
+        if cur.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+            cur.close()
+            return
+        # The whole setup (DDL, migrations, seeds, version stamp) is one transaction:
+        # the script opens it with BEGIN and only the final commit below ends it.
         cur.executescript('''
-            PRAGMA foreign_keys = ON;
-            
+            BEGIN IMMEDIATE;
+
             CREATE TABLE IF NOT EXISTS patients (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 name TEXT, species TEXT, breed TEXT, age INTEGER,
@@ -72,6 +139,7 @@ class Database:
                     stock INTEGER DEFAULT 0,
                     price REAL DEFAULT 0.0,
                     form TEXT,
+                    use TEXT,
                     supplier_name TEXT,
                     supplier_contact TEXT
                 );
@@ -88,66 +156,195 @@ class Database:
                     notes TEXT,
                     deleted_at DATETIME DEFAULT CURRENT_TIMESTAMP
                 );
+
+            -- Appointment lookups by day (covers the day-list filter, sort and join keys)
+            -- and the per-save doctor/patient conflict check
+            CREATE INDEX IF NOT EXISTS idx_appts_day_covering ON appointments(date, time, status, patient_id, doctor_id);
+            CREATE INDEX IF NOT EXISTS idx_appts_doctor_date ON appointments(doctor_id, date, time);
+            CREATE INDEX IF NOT EXISTS idx_appts_patient_date ON appointments(patient_id, date, time);
+
+            -- Diagnosis view: completed appointments, newest first (seek on status, no sort;
+            -- id is the page tiebreaker, so it is part of the key too)
+            CREATE INDEX IF NOT EXISTS idx_appts_status_date_id ON appointments(status, date DESC, time DESC, id);
+
+            -- Per-appointment diagnosis and per-diagnosis medication probes
+            CREATE INDEX IF NOT EXISTS idx_diagnoses_appointment ON diagnoses(appointment_id);
+            CREATE INDEX IF NOT EXISTS idx_medications_diagnosis ON medications(diagnosis_id);
         ''')
 
-        # If the database existed before this migration, ensure `form` column exists
-        try:
-            cols = [r[1] for r in cur.execute("PRAGMA table_info(medicines)").fetchall()]
-            if 'form' not in cols:
-                cur.execute("ALTER TABLE medicines ADD COLUMN form TEXT")
-                cls._conn.commit()
-        except Exception:
-            # If table does not exist yet or PRAGMA fails, ignore — table creation above will handle it
-            pass
+        # Column migrations for databases created before these columns existed. Like the
+        # rest of setup this only runs while user_version < SCHEMA_VERSION; both tables'
+        # columns are read in one catalog query.
+        cols = {tuple(r) for r in cur.execute(
+            "SELECT 'medicines', name FROM pragma_table_info('medicines') "
+            "UNION ALL SELECT 'patients', name FROM pragma_table_info('patients')"
+        )}
+        if ('medicines', 'form') not in cols:
+            cur.execute("ALTER TABLE medicines ADD COLUMN form TEXT")
+        if ('medicines', 'use') not in cols:
+            cur.execute("ALTER TABLE medicines ADD COLUMN use TEXT")
+        if ('patients', 'is_deleted') not in cols:
+            cur.execute("ALTER TABLE patients ADD COLUMN is_deleted INTEGER DEFAULT 0")
+        # needs is_deleted, so it can only be created once the migration above has run
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_patients_is_deleted ON patients(is_deleted)")
 
-        # Ensure patients table has is_deleted column on older DBs
-        try:
-            pcols = [r[1] for r in cur.execute("PRAGMA table_info(patients)").fetchall()]
-            if 'is_deleted' not in pcols:
-                cur.execute("ALTER TABLE patients ADD COLUMN is_deleted INTEGER DEFAULT 0")
-                cls._conn.commit()
-        except Exception:
-            pass
-
-        ## Seed default doctors if table is empty
-        if not cur.execute("SELECT * FROM doctors").fetchone():
-            cur.executemany(
-                "INSERT INTO doctors (name, specialization, fee) VALUES (?, ?, ?)",
-                [
-                    ('Dr. Sarah Geronimo', 'Nutrition', 3500.00),
-                    ('Dr. Carlos Garcia', 'Grooming', 2500.00),
-                    ('Dr. Princess Valdez', 'Surgery', 15000.00),
-                    ('Dr. Robert Tuazon', 'Dentistry', 5000.00),
-                    ('Dr. Lisa Badlis', 'Ophthalmology', 4500.00),
-                    ('Dr. James Villaluna', 'Dermatology', 5000.00)
-                ]
-            )
-            cls._conn.commit()
-        # Ensure requested General Veterinarians are present (idempotent)
+        # Trigram full-text index over patient and owner names, kept in sync by triggers.
+        # Statements run one by one: executescript() would commit the setup transaction.
+        if SUPPORTS_FTS:
+            for stmt in (
+                """CREATE VIRTUAL TABLE IF NOT EXISTS patients_fts USING fts5(
+                       name, owner_name, content='patients', content_rowid='id', tokenize='trigram')""",
+                """CREATE TRIGGER IF NOT EXISTS patients_fts_ai AFTER INSERT ON patients BEGIN
+                       INSERT INTO patients_fts(rowid, name, owner_name) VALUES (new.id, new.name, new.owner_name);
+                   END""",
+                """CREATE TRIGGER IF NOT EXISTS patients_fts_ad AFTER DELETE ON patients BEGIN
+                       INSERT INTO patients_fts(patients_fts, rowid, name, owner_name)
+                       VALUES ('delete', old.id, old.name, old.owner_name);
+                   END""",
+                """CREATE TRIGGER IF NOT EXISTS patients_fts_au AFTER UPDATE OF name, owner_name ON patients BEGIN
+                       INSERT INTO patients_fts(patients_fts, rowid, name, owner_name)
+                       VALUES ('delete', old.id, old.name, old.owner_name);
+                       INSERT INTO patients_fts(rowid, name, owner_name) VALUES (new.id, new.name, new.owner_name);
+                   END""",
+                "INSERT INTO patients_fts(patients_fts) VALUES ('rebuild')",
+            ):
+                cur.execute(stmt)
+
+        ## Seed default doctors (idempotent)
+        specialist_doctors = [
+            ('Dr. Sarah Geronimo', 'Nutrition', 3500.00),
+            ('Dr. Carlos Garcia', 'Grooming', 2500.00),
+            ('Dr. Princess Valdez', 'Surgery', 15000.00),
+            ('Dr. Robert Tuazon', 'Dentistry', 5000.00),
+            ('Dr. Lisa Badlis', 'Ophthalmology', 4500.00),
+            ('Dr. James Villaluna', 'Dermatology', 5000.00)
+        ]
+        # Requested General Veterinarians: added when missing, fee enforced otherwise
         general_doctors = [
             ('Dr. Miguel Santos', 'General Veterinarian', 1500.00),
             ('Dr. Katrina Dela Cruz', 'General Veterinarian', 1500.00),
             ('Dr. Jerome Bautista', 'General Veterinarian', 1500.00),
         ]
-        for name, spec, fee in general_doctors:
-            if not cur.execute("SELECT id FROM doctors WHERE name = ?", (name,)).fetchone():
-                cur.execute("INSERT INTO doctors (name, specialization, fee) VALUES (?, ?, ?)", (name, spec, fee))
-            else:
-                # ensure fee is set to requested value (lower price enforcement)
-                cur.execute("UPDATE doctors SET fee = ? WHERE name = ?", (fee, name))
-        cls._conn.commit()
+        # specialists only seed an empty table: setup re-runs on every schema bump,
+        # and a specialist the clinic removed must not come back
+        if not cur.execute("SELECT EXISTS(SELECT 1 FROM doctors)").fetchone()[0]:
+            cur.executemany("INSERT INTO doctors (name, specialization, fee) VALUES (?, ?, ?)", specialist_doctors)
+        # insert the missing ones, then enforce the fee on every row with their name
+        # (doctor names aren't unique, so presence is checked in SQL rather than by a constraint)
+        cur.executemany(
+            "INSERT INTO doctors (name, specialization, fee) SELECT ?1, ?2, ?3 "
+            "WHERE NOT EXISTS (SELECT 1 FROM doctors WHERE name = ?1)",
+            general_doctors
+        )
+        cur.executemany("UPDATE doctors SET fee = ?3 WHERE name = ?1", general_doctors)
+        # surgery fee fix only: a surgeon the clinic removed is never re-inserted
+        cur.execute("UPDATE doctors SET fee = ? WHERE name = ?", (15000.00, 'Dr. Princess Valdez'))
+        # refresh planner statistics so the new indexes get picked
+        cur.execute("ANALYZE")
+        cur.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
         cur.close()
     
+    @classmethod
+    @contextmanager
+    ## Run several statements atomically: BEGIN IMMEDIATE, commit on success, roll back on error
+    def transaction(cls):
+        """
+        Usage:
+            with Database.transaction() as conn:
+                conn.execute("UPDATE ...", (...))
+                conn.execute("INSERT ...", (...))
+        Inside an already open transaction (e.g. a nested transaction()) the block runs
+        as a savepoint instead: it rolls back on its own, and only the outer one commits.
+        """
+        conn = cls.get_connection()
+        with cls._lock:
+            if conn.in_transaction:
+                conn.execute("SAVEPOINT nested_transaction")
+                try:
+                    yield conn
+                except Exception:
+                    conn.execute("ROLLBACK TO nested_transaction")
+                    conn.execute("RELEASE nested_transaction")
+                    raise
+                else:
+                    conn.execute("RELEASE nested_transaction")
+                return
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except Exception:
+                conn.rollback()
+                raise
+            else:
+                conn.commit()
+
     @classmethod
     ## Execute a SELECT and return all rows
     def query(cls, sql, params=()):
         return cls.get_connection().execute(sql, params).fetchall()
     
+    @classmethod
+    ## Execute a SELECT and return the first column of the first row (or default)
+    def scalar(cls, sql, params=(), default=None):
+        """
+        Usage: if Database.scalar("SELECT EXISTS(SELECT 1 FROM ... WHERE id = ?)", (x,)): ...
+        For presence checks and counts: no Row objects, no fetchall list.
+        """
+        row = cls.get_connection().execute(sql, params).fetchone()
+        return default if row is None else row[0]
+
+    @classmethod
+    ## Execute a SELECT and return all rows as plain tuples (for positional unpacking in hot loops)
+    def query_tuples(cls, sql, params=()):
+        cur = cls.get_connection().cursor()
+        cur.row_factory = None
+        try:
+            return cur.execute(sql, params).fetchall()
+        finally:
+            cur.close()
+
+    @classmethod
+    ## Run a SELECT on the background reader and hand the rows to on_done on the Tk thread
+    def query_async(cls, widget, sql, params, on_done, poll_ms=15):
+        """
+        Usage: Database.query_async(frame, "SELECT ...", (...), lambda rows: render(rows))
+        The query runs off the UI thread; on_done(rows) is called from widget's event loop
+        once the rows are ready, or never if widget was destroyed in the meantime.
+        Writes stay on the main connection: a read submitted after a commit sees it.
+        """
+        cls.get_connection()  # schema setup and migrations run before the first read
+        future = cls._reader.submit(cls._reader_query, sql, params)
+
+        ## Poll from the Tk loop; widgets may only be touched from the thread that owns them
+        def deliver():
+            if not widget.winfo_exists():
+                return
+            if future.done():
+                on_done(future.result())
+            else:
+                widget.after(poll_ms, deliver)
+        widget.after(poll_ms, deliver)
+        return future
+
+    @classmethod
+    ## Internal: run a SELECT on the reader thread's read-only connection
+    def _reader_query(cls, sql, params):
+        if cls._reader_conn is None:
+            uri = Path(DB_FILE).resolve().as_uri() + "?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, cached_statements=256)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA mmap_size = 268435456")
+            cls._reader_conn = conn
+        return cls._reader_conn.execute(sql, params).fetchall()
+
     @classmethod
     ## Execute a statement and commit (no return)
     def execute(cls, sql, params=()):
-        cls.get_connection().execute(sql, params)
-        cls.get_connection().commit()
+        conn = cls.get_connection()
+        with cls._lock:
+            conn.execute(sql, params)
+            conn.commit()
         
     @classmethod
     ## Execute a statement and return the cursor's last inserted id
@@ -157,7 +354,29 @@ class Database:
         Usage: Database.execute_returning_id("INSERT INTO ...", (val1, val2))
         """
         conn = cls.get_connection()
-        cur = conn.cursor()
-        cur.execute(sql, params)
-        conn.commit()
-        return cur.lastrowid
+        with cls._lock:
+            cur = conn.cursor()
+            cur.execute(sql, params)
+            conn.commit()
+            return cur.lastrowid
+
+    @classmethod
+    ## Refresh planner statistics where needed and close the shared connection
+    def close(cls):
+        with cls._lock:
+            if cls._conn is None:
+                return
+            try:
+                if cls._conn.in_transaction:
+                    cls._conn.commit()
+                # cheap: only re-analyzes tables whose stats the session's queries showed to be stale
+                cls._conn.execute("PRAGMA optimize")
+            except sqlite3.Error:
+                pass
+            finally:
+                cls._conn.close()
+                cls._conn = None
+
+
+# run PRAGMA optimize and close cleanly when the app exits
+atexit.register(Database.close)
@@ -1,18 +1,95 @@
 """
 CLASS : 4
 """
+import functools
 import customtkinter as ctk
+import tkinter as tk
 from tkinter import messagebox
 from datetime import datetime
 
 from abc import ABC, abstractmethod
 
+from database import SUPPORTS_FTS, SUPPORTS_RETURNING
+
 app = None
 db = None
 refs = {}
 
+# Fixed SQL text for the hot lookups: the connection's statement cache is keyed
+# by the exact string, so every call reuses one prepared statement per query
+_MEDS_BY_DIAGNOSIS_SQL = (
+    "SELECT id, diagnosis_id, medicine_name, quantity, price "
+    "FROM medications WHERE diagnosis_id = ? ORDER BY id"
+)
+# same quantity/price defaults as the medication rows shown in the view
+_MED_TOTAL_SQL = (
+    "SELECT COALESCE(SUM(COALESCE(price, 0.0) * COALESCE(NULLIF(quantity, 0), 1)), 0.0) "
+    "FROM medications WHERE diagnosis_id = ?"
+)
+# an appointment's diagnoses with their medications (NULL med_id for none), one row per
+# medication, newest diagnosis first; grouped per diagnosis by load_diagnosis_for_appointment
+_DIAGNOSES_WITH_MEDS_SQL = """
+    SELECT diag.id, diag.appointment_id, diag.patient_id, diag.doctor_id,
+           diag.diagnosis_text, diag.diagnosis_date, d.name AS doctor_name, p.name AS pet_name,
+           m.id AS med_id, m.medicine_name, m.quantity, m.price
+    FROM diagnoses diag
+    JOIN doctors d ON diag.doctor_id = d.id
+    JOIN patients p ON diag.patient_id = p.id
+    LEFT JOIN medications m ON m.diagnosis_id = diag.id
+    WHERE diag.appointment_id = ?
+    ORDER BY diag.diagnosis_date DESC, diag.id DESC, m.id
+"""
+_DIAGNOSIS_COLUMNS = ('id', 'appointment_id', 'patient_id', 'doctor_id',
+                      'diagnosis_text', 'diagnosis_date', 'doctor_name', 'pet_name')
+# certificate lines: quantity/price defaults, subtotal and the running total come
+# ready from SQLite (total via a window over the same rows)
+_CERT_MEDS_SQL = """
+    SELECT medicine_name, qty, price, qty * price AS subtotal, SUM(qty * price) OVER () AS total
+    FROM (SELECT id, medicine_name, COALESCE(NULLIF(quantity, 0), 1) AS qty, COALESCE(price, 0.0) AS price
+          FROM medications WHERE diagnosis_id = ?)
+    ORDER BY id
+"""
+# completed appointments with diagnosis existence, one variant per search mode; only the
+# columns the view reads, and has_diag must stay last (mark_selected_card_diagnosed re-keys on it)
+_COMPLETED_APTS_SQL = """
+    SELECT a.id, a.date, a.time, a.patient_id, a.doctor_id,
+           p.name as pet_name, p.species, p.owner_name,
+           d.name as doctor_name, d.fee,
+           EXISTS(SELECT 1 FROM diagnoses x WHERE x.appointment_id = a.id) AS has_diag
+    FROM appointments a
+    JOIN patients p ON a.patient_id = p.id
+    JOIN doctors d ON a.doctor_id = d.id
+    WHERE a.status = 'completed' {}
+    ORDER BY a.date DESC, a.time DESC, a.id LIMIT ? OFFSET ?
+"""
+_COMPLETED_APTS_ALL_SQL = _COMPLETED_APTS_SQL.format("")
+_COMPLETED_APTS_FTS_SQL = _COMPLETED_APTS_SQL.format(
+    "AND p.id IN (SELECT rowid FROM patients_fts WHERE patients_fts MATCH ?)")
+_COMPLETED_APTS_LIKE_SQL = _COMPLETED_APTS_SQL.format(
+    "AND (p.name LIKE ? OR p.owner_name LIKE ?)")
+
+# mouse wheel events (Windows/macOS, then X11 up/down buttons)
+_WHEEL_EVENTS = ("<MouseWheel>", "<Button-4>", "<Button-5>")
+
+# certificate ruler lines
+_RULE_EQ = "=" * 70
+_RULE_DASH = "-" * 70
+
+# medicine browser rows (name, price, use text), kept across view opens and cleared
+# through invalidate_medicine_cache(); 'version' counts invalidations so a fetch still
+# in flight when one happens doesn't store the rows it read before the change
+_medicine_cache = {'version': 0, 'rows': None}
+
+
+## Drop the cached medicine browser rows (called by the medicine CRUD paths)
+def invalidate_medicine_cache():
+    _medicine_cache['version'] += 1
+    _medicine_cache['rows'] = None
+
 
 ## Normalize doctor display name (avoid doubling 'Dr.' prefix)
+# pure and called per rendered diagnosis with few distinct names, so memoize it
+@functools.lru_cache(maxsize=512)
 def format_doctor_name(name):
     """Avoid doubling the 'Dr.' prefix when doctor name already includes it."""
     if not name:
@@ -97,15 +174,21 @@ class Medication:
     @staticmethod
     ## List medications for a given diagnosis id
     def list_for_diagnosis(diagnosis_id):
-        return db.query("SELECT * FROM medications WHERE diagnosis_id = ? ORDER BY id", (diagnosis_id,))
+        return db.query(_MEDS_BY_DIAGNOSIS_SQL, (diagnosis_id,))
+
+    @staticmethod
+    ## Sum of price * quantity over a diagnosis' medications, computed by SQLite
+    def total_for_diagnosis(diagnosis_id):
+        return db.scalar(_MED_TOTAL_SQL, (diagnosis_id,), 0.0)
 
 
 class DiagnosisView:
     """Helper class to encapsulate diagnosis-related DB operations.
     This keeps UI code intact while providing encapsulated methods for save/add/delete logic.
     """
+    @staticmethod
     ## Save or update diagnosis logic used by the UI
-    def save_diagnosis_logic(self, apt, diag_text, selected_diagnosis):
+    def save_diagnosis_logic(apt, diag_text, selected_diagnosis):
         today = datetime.now().strftime('%Y-%m-%d')
         if selected_diagnosis:
             # Convert sqlite3.Row to dict if needed
@@ -117,18 +200,21 @@ class DiagnosisView:
                 """, (diag_text, today, diag_dict['id']))
                 return {'updated': True}
         
-        existing = db.query("SELECT id FROM diagnoses WHERE appointment_id = ?", (apt['id'],))
-        if existing:
-            db.execute("""
+        # try the update first and insert only if nothing matched, in one transaction,
+        # so the existence probe disappears and two saves can't both insert
+        with db.transaction() as conn:
+            existing = conn.execute("""
                 UPDATE diagnoses SET diagnosis_text = ?, diagnosis_date = ?
                 WHERE appointment_id = ?
-            """, (diag_text, today, apt['id']))
+            """, (diag_text, today, apt['id'])).rowcount
+            if not existing:
+                diag_id = conn.execute("""
+                    INSERT INTO diagnoses (appointment_id, patient_id, doctor_id, diagnosis_text, diagnosis_date)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (apt['id'], apt['patient_id'], apt['doctor_id'], diag_text, today)).lastrowid
+        if existing:
             return {'updated': True}
         else:
-            diag_id = db.execute_returning_id("""
-                INSERT INTO diagnoses (appointment_id, patient_id, doctor_id, diagnosis_text, diagnosis_date)
-                VALUES (?, ?, ?, ?, ?)
-            """, (apt['id'], apt['patient_id'], apt['doctor_id'], diag_text, today))
             return {
                 'created': True,
                 'id': diag_id,
@@ -139,36 +225,49 @@ class DiagnosisView:
                 'diagnosis_date': today
             }
 
+    @staticmethod
     ## Add medication to a diagnosis, update inventory stock
-    def add_medication_logic(self, diagnosis_id, med_name, price, qty):
-        # Check inventory
-        inv = db.query("SELECT * FROM medicines WHERE name = ?", (med_name,))
-        if not inv:
-            return {'ok': False, 'error': f"Medicine '{med_name}' not found in inventory. Please register it in Medicines view first."}
-        inv = inv[0]
-        available = int(inv['stock'] or 0)
-        if qty > available:
-            return {'ok': False, 'error': f"Requested quantity ({qty}) exceeds available stock ({available})."}
+    def add_medication_logic(diagnosis_id, med_name, price, qty):
         try:
-            db.execute("INSERT INTO medications (diagnosis_id, medicine_name, quantity, price) VALUES (?, ?, ?, ?)",
-                       (diagnosis_id, med_name, qty, price))
-            db.execute("UPDATE medicines SET stock = stock - ? WHERE id = ?", (qty, inv['id']))
-            return {'ok': True}
+            # stock check, medication insert and stock decrement commit together (one fsync)
+            with db.transaction() as conn:
+                # check and decrement in one statement; no row changed means missing or short,
+                # and only then is the stock read back for the error message
+                taken = conn.execute(
+                    "UPDATE medicines SET stock = stock - ? WHERE name = ? AND COALESCE(stock, 0) >= ?",
+                    (qty, med_name, qty)).rowcount
+                if not taken:
+                    inv = conn.execute("SELECT stock FROM medicines WHERE name = ?", (med_name,)).fetchone()
+                    if not inv:
+                        return {'ok': False, 'error': f"Medicine '{med_name}' not found in inventory. Please register it in Medicines view first."}
+                    available = int(inv['stock'] or 0)
+                    return {'ok': False, 'error': f"Requested quantity ({qty}) exceeds available stock ({available})."}
+                med_id = conn.execute("INSERT INTO medications (diagnosis_id, medicine_name, quantity, price) VALUES (?, ?, ?, ?)",
+                                      (diagnosis_id, med_name, qty, price)).lastrowid
+            return {'ok': True, 'med': {'id': med_id, 'diagnosis_id': diagnosis_id,
+                                        'medicine_name': med_name, 'quantity': qty, 'price': price}}
         except Exception as e:
             return {'ok': False, 'error': str(e)}
 
+    @staticmethod
     ## Delete medication and restore inventory stock
-    def delete_med_logic(self, med_id):
+    def delete_med_logic(med_id):
         try:
-            mrow = db.query("SELECT * FROM medications WHERE id = ?", (med_id,))
-            if mrow:
-                mrow = mrow[0]
-                med_name = mrow['medicine_name']
-                qty = int(mrow['quantity'] or 0)
-                inv = db.query("SELECT * FROM medicines WHERE name = ?", (med_name,))
-                if inv:
-                    db.execute("UPDATE medicines SET stock = stock + ? WHERE name = ?", (qty, med_name))
-            db.execute("DELETE FROM medications WHERE id = ?", (med_id,))
+            # delete the medication and restock its medicine as one transaction
+            with db.transaction() as conn:
+                if SUPPORTS_RETURNING:
+                    # the DELETE hands back what to restock; no separate read of the row
+                    for name, qty in conn.execute(
+                            "DELETE FROM medications WHERE id = ? RETURNING medicine_name, quantity",
+                            (med_id,)).fetchall():
+                        conn.execute("UPDATE medicines SET stock = stock + ? WHERE name = ?", (int(qty or 0), name))
+                else:
+                    conn.execute("""
+                        UPDATE medicines
+                        SET stock = stock + (SELECT COALESCE(quantity, 0) FROM medications WHERE id = ?)
+                        WHERE name = (SELECT medicine_name FROM medications WHERE id = ?)
+                    """, (med_id, med_id))
+                    conn.execute("DELETE FROM medications WHERE id = ?", (med_id,))
             return {'ok': True}
         except Exception as e:
             return {'ok': False, 'error': str(e)}
@@ -181,7 +280,8 @@ def show_diagnosis_view(parent):
     
     # Slight scale increase for this module
     module_scale = 4
-    ## Font helper for this module
+    ## Font helper for this module (a handful of distinct fonts, shared by every widget)
+    @functools.lru_cache(maxsize=64)
     def F(size, weight=None):
         s = int(size + module_scale)
         return ("Arial", s, weight) if weight else ("Arial", s)
@@ -214,69 +314,123 @@ def show_diagnosis_view(parent):
     
     selected_apt = [None]
     selected_card = [None]
+    # appointments given their first diagnosis in this view; their cached rows still say has_diag=0
+    newly_diagnosed = set()
+    # card -> its unselected color (depends on whether a diagnosis exists)
+    card_colors = {}
+    # row values -> rendered card; reloads re-pack these instead of rebuilding widgets
+    rendered_cards = {}
+    # card -> its status label, so a saved diagnosis can flip it in place
+    card_status_labels = {}
+    # pending debounced search and the query the list currently shows
+    search_job = [None]
+    last_search = [""]
+    
+    # has_diag -> (card color, status text, status color)
+    apt_card_style = {
+        True: ("#e8f8f5", "Has Diagnosis", "#27ae60"),
+        False: ("#f8f9fa", "No Diagnosis", "#e74c3c"),
+    }
+    apt_status_font, apt_body_font = F(11, "bold"), F(12)
+    
+    # cards are added a page at a time; the query and offset of the current listing
+    APT_PAGE_SIZE = 50
+    # 'request' numbers page fetches so a superseded one is dropped when its rows arrive;
+    # 'more' is set while a further page exists and no fetch for it is in flight
+    apt_page = {'sql': None, 'params': (), 'offset': 0, 'search': "", 'request': 0, 'more': False}
+    seen_rows = set()
+    # the Show more button closing the list while another page exists
+    show_more_btn = [None]
     
     ## Load completed appointments for selection and display
     def load_appointments(search_query=""):
+        # an explicit load supersedes any pending debounced one
+        if search_job[0]:
+            parent.after_cancel(search_job[0])
+            search_job[0] = None
         for w in apt_container.winfo_children():
-            w.destroy()
+            if w in card_colors:
+                w.pack_forget()
+            else:
+                w.destroy()
+        if selected_card[0] in card_colors:
+            selected_card[0].configure(fg_color=card_colors[selected_card[0]])
+        selected_card[0] = None
         selected_apt[0] = None
+        last_search[0] = search_query
         
-        sql = """
-            SELECT a.*, p.name as pet_name, p.species, p.owner_name, p.owner_contact,
-                   d.name as doctor_name, d.specialization, d.fee
-            FROM appointments a
-            JOIN patients p ON a.patient_id = p.id
-            JOIN doctors d ON a.doctor_id = d.id
-            WHERE a.status = 'completed'
-        """
-        params = []
-        
-        if search_query:
-            sql += " AND (p.name LIKE ? OR p.owner_name LIKE ?)"
-            params.extend([f"%{search_query}%", f"%{search_query}%"])
+        # diagnosis existence comes back with each row instead of one probe per card
+        if not search_query:
+            sql, params = _COMPLETED_APTS_ALL_SQL, ()
+        elif SUPPORTS_FTS and len(search_query) >= 3:
+            # trigram index lookup; a quoted phrase matches as a case-insensitive substring
+            sql, params = _COMPLETED_APTS_FTS_SQL, ('"' + search_query.replace('"', '""') + '"',)
+        else:
+            # trigrams need 3+ characters; shorter terms fall back to a scan
+            sql, params = _COMPLETED_APTS_LIKE_SQL, (f"%{search_query}%", f"%{search_query}%")
         
-        sql += " ORDER BY a.date DESC, a.time DESC"
+        apt_page.update(sql=sql, params=tuple(params), offset=0, search=search_query)
+        seen_rows.clear()
+        load_appointment_page()
+    
+    ## Fetch the next page of completed appointments (one extra row tells if more exist)
+    def load_appointment_page():
+        for w in apt_container.winfo_children():
+            if w not in card_colors:
+                w.destroy()
         
-        appointments = db.query(sql, tuple(params))
+        apt_page['request'] += 1
+        apt_page['more'] = False
+        request = apt_page['request']
         
-        if not appointments:
-            ctk.CTkLabel(apt_container, text="No completed appointments found.",
-                        text_color="gray", font=F(12)).pack(pady=20)
-            return
+        ## Rows arrive from the background reader; ignore them if a newer listing started
+        def on_rows(rows):
+            if request == apt_page['request']:
+                show_appointment_page(rows)
         
-        for apt in appointments:
-            existing_diagnosis = db.query(
-                "SELECT id FROM diagnoses WHERE appointment_id = ?", (apt['id'],))
-            has_diagnosis = len(existing_diagnosis) > 0
+        params = apt_page['params'] + (APT_PAGE_SIZE + 1, apt_page['offset'])
+        db.query_async(apt_container, apt_page['sql'], params, on_rows)
+    
+    ## Append cards for one fetched page of completed appointments
+    def show_appointment_page(rows):
+        has_more = False
+        for i, apt in enumerate(rows):
+            if i == APT_PAGE_SIZE:
+                has_more = True
+                break
+            apt_page['offset'] += 1
+            # any change to the row (diagnosis added, patient renamed, ...) gives a new key
+            key = tuple(apt)
+            seen_rows.add(key)
+            card = rendered_cards.get(key)
+            if card is not None:
+                card.pack(fill="x", padx=5, pady=4)
+                continue
             
-            card_color = "#e8f8f5" if has_diagnosis else "#f8f9fa"
+            card_color, status_text, status_color = apt_card_style[bool(apt['has_diag'])]
             card = ctk.CTkFrame(apt_container, fg_color=card_color, corner_radius=8,
                                border_width=1, border_color="#e0e0e0")
             card.pack(fill="x", padx=5, pady=4)
+            card_colors[card] = card_color
+            rendered_cards[key] = card
             
             fee_str = f"P{float(apt['fee']):,.2f}" if apt['fee'] else "P0.00"
-            status_text = "Has Diagnosis" if has_diagnosis else "No Diagnosis"
-            status_color = "#27ae60" if has_diagnosis else "#e74c3c"
-            
-            header = f"{apt['date']} {apt['time']} - {apt['pet_name']} ({apt['species']})"
-            ctk.CTkLabel(card, text=header, font=F(13, "bold"),
-                        anchor="w").grid(row=0, column=0, sticky="w", padx=10, pady=(8,2))
             
-            ctk.CTkLabel(card, text=status_text, font=F(11, "bold"),
-                        text_color=status_color).grid(row=0, column=1, sticky="e", padx=10, pady=(8,2))
+            # header and owner line share one two-line label; the colored status stays separate
+            text = (f"{apt['date']} {apt['time']} - {apt['pet_name']} ({apt['species']})\n"
+                    f"Owner: {apt['owner_name']} | {apt['doctor_name']} | Fee: {fee_str}")
+            ctk.CTkLabel(card, text=text, font=apt_body_font, justify="left",
+                        anchor="w").grid(row=0, column=0, sticky="w", padx=10, pady=8)
             
-            ctk.CTkLabel(card, text=f"Owner: {apt['owner_name']} | {apt['doctor_name']} | Fee: {fee_str}",
-                        font=F(11), anchor="w").grid(row=1, column=0, columnspan=2,
-                                                            sticky="w", padx=10, pady=(0,8))
+            status_label = ctk.CTkLabel(card, text=status_text, font=apt_status_font, text_color=status_color)
+            status_label.grid(row=0, column=1, sticky="ne", padx=10, pady=8)
+            card_status_labels[card] = status_label
             
             ## When appointment card clicked, select and load diagnosis
             def on_card_click(e=None, apt_data=apt, card_ref=card):
                 if selected_card[0] and selected_card[0] != card_ref:
                     try:
-                        existing = db.query("SELECT id FROM diagnoses WHERE appointment_id = ?",
-                                          (selected_apt[0]['id'],)) if selected_apt[0] else []
-                        prev_color = "#e8f8f5" if existing else "#f8f9fa"
-                        selected_card[0].configure(fg_color=prev_color)
+                        selected_card[0].configure(fg_color=card_colors.get(selected_card[0], "#f8f9fa"))
                     except Exception:
                         pass
                 
@@ -287,11 +441,87 @@ def show_diagnosis_view(parent):
                 apt_info_label.configure(
                     text=f"Selected: {apt_data['pet_name']} - {apt_data['date']} {apt_data['time']}", font=F(11))
                 
-                load_diagnosis_for_appointment(apt_data['id'])
+                # the row already says whether a diagnosis exists; skip the lookup when none does
+                if apt_data['has_diag'] or apt_data['id'] in newly_diagnosed:
+                    load_diagnosis_for_appointment(apt_data['id'])
+                else:
+                    show_no_diagnosis()
             
             card.bind("<Button-1>", on_card_click)
             for child in card.winfo_children():
                 child.bind("<Button-1>", on_card_click)
+            for widget in (card, *card.winfo_children()):
+                for seq in _WHEEL_EVENTS:
+                    widget.bind(seq, schedule_apt_scroll_check, add="+")
+        
+        apt_page['more'] = has_more
+        show_more_btn[0] = None
+        if has_more:
+            show_more_btn[0] = ctk.CTkButton(apt_container, text="Show more", command=load_appointment_page,
+                                             fg_color="#9b59b6", height=30 + module_scale, font=F(11))
+            show_more_btn[0].pack(pady=(4, 8))
+            for seq in _WHEEL_EVENTS:
+                show_more_btn[0].bind(seq, schedule_apt_scroll_check, add="+")
+        elif not apt_page['search']:
+            # a fully paged unfiltered listing has seen every live row, so anything else is stale
+            for key in [k for k in rendered_cards if k not in seen_rows]:
+                card_colors.pop(rendered_cards[key], None)
+                card_status_labels.pop(rendered_cards[key], None)
+                rendered_cards.pop(key).destroy()
+        
+        if not seen_rows:
+            ctk.CTkLabel(apt_container, text="No completed appointments found.",
+                        text_color="gray", font=F(12)).pack(pady=20)
+    
+    ## Fetch the next page once the Show more button at the end of the list scrolls into view
+    def check_apt_scroll_end():
+        btn = show_more_btn[0]
+        if not apt_page['more'] or btn is None or not btn.winfo_exists():
+            return
+        # the list's visible area ends where the panel packed below it (diag_header) begins
+        if btn.winfo_rooty() < diag_header.winfo_rooty():
+            load_appointment_page()
+    
+    ## Wheel scrolling and resizes apply after the event's own bindings; check once they have
+    def schedule_apt_scroll_check(e=None):
+        apt_container.after_idle(check_apt_scroll_end)
+    
+    # add="+" keeps the frame's own <Configure> binding that updates its scroll region
+    apt_container.bind("<Configure>", schedule_apt_scroll_check, add="+")
+    for seq in _WHEEL_EVENTS:
+        apt_container.bind(seq, schedule_apt_scroll_check, add="+")
+    
+    ## Flip the selected card to "Has Diagnosis" in place after its first diagnosis is saved
+    def mark_selected_card_diagnosed():
+        card, apt = selected_card[0], selected_apt[0]
+        if card is None or apt is None or card not in card_status_labels:
+            return
+        newly_diagnosed.add(apt['id'])
+        card_color, status_text, status_color = apt_card_style[True]
+        card_colors[card] = card_color
+        card_status_labels[card].configure(text=status_text, text_color=status_color)
+        # re-key the cached card under the row a reload now returns (has_diag is the last column)
+        old_key = tuple(apt)
+        if rendered_cards.get(old_key) is card:
+            rendered_cards[old_key[:-1] + (1,)] = rendered_cards.pop(old_key)
+    
+    ## Debounced search-as-you-type for the completed appointments list
+    def on_search_key(e=None):
+        if search_job[0]:
+            parent.after_cancel(search_job[0])
+        
+        def run():
+            search_job[0] = None
+            if not search_entry.winfo_exists():
+                return
+            query = search_entry.get()
+            if query != last_search[0]:
+                load_appointments(query)
+        search_job[0] = parent.after(200, run)
+    
+    # reload 200 ms after the last keystroke rather than on every key; Enter searches at once
+    search_entry.bind("<KeyRelease>", on_search_key)
+    search_entry.bind("<Return>", lambda e: load_appointments(search_entry.get()))
     
     ctk.CTkButton(search_frame, text="Search",
                  command=lambda: load_appointments(search_entry.get()),
@@ -310,34 +540,47 @@ def show_diagnosis_view(parent):
     diag_container.pack(fill="both", expand=True, padx=10, pady=(5,10))
     
     selected_diagnosis = [None]
+    # medications of the shown appointment's diagnoses, by diagnosis id; a diagnosis whose
+    # medications changed is dropped so load_medications queries it again
+    appointment_meds = {}
+    
+    ## Clear the diagnosis panel and show the no-diagnosis placeholder
+    def show_no_diagnosis():
+        for w in diag_container.winfo_children():
+            w.destroy()
+        selected_diagnosis[0] = None
+        appointment_meds.clear()
+        ctk.CTkLabel(diag_container, text="No diagnosis recorded for this appointment.",
+                    text_color="gray", font=F(12)).pack(pady=20)
+        diagnosis_text.delete("1.0", "end")
+        load_medications(None)
     
     ## Load diagnoses for a selected appointment and display summaries
     def load_diagnosis_for_appointment(apt_id):
         for w in diag_container.winfo_children():
             w.destroy()
         selected_diagnosis[0] = None
+        appointment_meds.clear()
         
-        diagnoses = db.query("""
-            SELECT diag.*, d.name as doctor_name, p.name as pet_name
-            FROM diagnoses diag
-            JOIN doctors d ON diag.doctor_id = d.id
-            JOIN patients p ON diag.patient_id = p.id
-            WHERE diag.appointment_id = ?
-            ORDER BY diag.diagnosis_date DESC, diag.id DESC
-        """, (apt_id,))
+        # diagnoses and their medications in one query, grouped here per diagnosis
+        diagnoses = []
+        for row in db.query(_DIAGNOSES_WITH_MEDS_SQL, (apt_id,)):
+            meds = appointment_meds.get(row['id'])
+            if meds is None:
+                diagnoses.append({k: row[k] for k in _DIAGNOSIS_COLUMNS})
+                meds = appointment_meds[row['id']] = []
+            if row['med_id'] is not None:
+                meds.append({'id': row['med_id'], 'diagnosis_id': row['id'],
+                             'medicine_name': row['medicine_name'],
+                             'quantity': row['quantity'], 'price': row['price']})
         
         if not diagnoses:
-            ctk.CTkLabel(diag_container, text="No diagnosis recorded for this appointment.",
-                        text_color="gray", font=F(12)).pack(pady=20)
-            diagnosis_text.delete("1.0", "end")
-            load_medications(None)
+            show_no_diagnosis()
             return
         
         for diag in diagnoses:
-            # Get medications for this diagnosis
-            meds = db.query("SELECT * FROM medications WHERE diagnosis_id = ? ORDER BY id",
-                           (diag['id'],))
-            med_count = len(meds) if meds else 0
+            meds = appointment_meds[diag['id']]
+            med_count = len(meds)
             
             card = ctk.CTkFrame(diag_container, fg_color="#f0f9ff", corner_radius=8,
                                border_width=2, border_color="#3498db")
@@ -381,7 +624,7 @@ def show_diagnosis_view(parent):
                 selected_diagnosis[0] = diag_data
                 diagnosis_text.delete("1.0", "end")
                 diagnosis_text.insert("1.0", diag_data['diagnosis_text'])
-                load_medications(diag_data['id'])
+                load_medications(diag_data['id'], appointment_meds.get(diag_data['id']))
             
             card.bind("<Button-1>", on_diag_click)
             for child in card.winfo_children():
@@ -391,7 +634,7 @@ def show_diagnosis_view(parent):
             selected_diagnosis[0] = diagnoses[0]
             diagnosis_text.delete("1.0", "end")
             diagnosis_text.insert("1.0", diagnoses[0]['diagnosis_text'])
-            load_medications(diagnoses[0]['id'])
+            load_medications(diagnoses[0]['id'], appointment_meds[diagnoses[0]['id']])
     
     right = ctk.CTkFrame(container, fg_color="white", corner_radius=10, width=540 + module_scale*8)
     right.pack(side="right", fill="both", padx=(10,0))
@@ -426,8 +669,16 @@ def show_diagnosis_view(parent):
     selected_med_display = [None]
 
     # Scrollable browser for medicines (shows name and use). Clicking sets selection and autofills price.
-    med_browser_frame = ctk.CTkScrollableFrame(med_input_frame, height=180 + module_scale*6, fg_color="#fdf2e9")
+    # A Listbox only draws the rows in view, instead of a CTkFrame + CTkLabel per medicine.
+    med_browser_frame = ctk.CTkFrame(med_input_frame, fg_color="#fdf2e9", corner_radius=6)
     med_browser_frame.grid(row=1, column=0, columnspan=5, pady=(8,0), sticky="we")
+    med_browser = tk.Listbox(med_browser_frame, height=10, font=F(11), bg="#ffffff", fg="#2c3e50",
+                             relief="flat", borderwidth=0, highlightthickness=0, activestyle="none",
+                             selectbackground="#e8f8f5", selectforeground="#2c3e50", exportselection=False)
+    med_browser_scroll = ctk.CTkScrollbar(med_browser_frame, command=med_browser.yview)
+    med_browser.configure(yscrollcommand=med_browser_scroll.set)
+    med_browser.pack(side="left", fill="both", expand=True, padx=4, pady=4)
+    med_browser_scroll.pack(side="right", fill="y", pady=4)
 
     # price and qty placed below the browser
     ctk.CTkLabel(med_input_frame, text="Price (₱):", font=F(11)).grid(row=2, column=0,
@@ -444,66 +695,94 @@ def show_diagnosis_view(parent):
     med_list_frame = ctk.CTkScrollableFrame(form_container, height=140 + module_scale*6, fg_color="#fdf2e9")
     med_list_frame.pack(fill="x", pady=10)
     
-    medications_data = []
+    # running sum of the listed medications' subtotals, kept as rows are shown
+    medication_total = [0.0]
+    # placeholder label shown while the list is empty
+    med_empty_label = [None]
+    # live medication rows in display order: {'frame', 'name', 'sub', 'btn'} widgets,
+    # recycled by load_medications when another diagnosis is shown
+    med_rows = []
     
-    ## Load and display medications for a given diagnosis id
-    def load_medications(diagnosis_id):
-        for w in med_list_frame.winfo_children():
-            w.destroy()
-        medications_data.clear()
-        
-        if not diagnosis_id:
-            ctk.CTkLabel(med_list_frame, text="No medications yet",
-                        text_color="gray", font=F(12)).pack(pady=10)
-            update_total()
-            return
+    ## Show the empty-list placeholder if no medication rows remain
+    def show_med_placeholder(text="No medications prescribed"):
+        if med_empty_label[0] is None and not med_rows:
+            med_empty_label[0] = ctk.CTkLabel(med_list_frame, text=text, text_color="gray", font=F(12))
+            med_empty_label[0].pack(pady=10)
+    
+    ## Remove the empty-list placeholder, if shown
+    def hide_med_placeholder():
+        if med_empty_label[0] is not None:
+            med_empty_label[0].destroy()
+            med_empty_label[0] = None
+    
+    ## Create the widgets of one (still empty) medication row at the end of the list
+    def new_med_row():
+        frame = ctk.CTkFrame(med_list_frame, fg_color="#fff5eb", corner_radius=5)
+        frame.pack(fill="x", padx=5, pady=2)
+        row = {'frame': frame}
+        row['name'] = ctk.CTkLabel(frame, text="", font=F(11), anchor="w")
+        row['name'].pack(side="left", padx=10, pady=5)
+        row['sub'] = ctk.CTkLabel(frame, text="", font=F(11, "bold"), anchor="e")
+        row['sub'].pack(side="right", padx=10, pady=5)
+        row['btn'] = ctk.CTkButton(frame, text="X", width=30 + module_scale, height=30 + module_scale, fg_color="#e74c3c")
+        row['btn'].pack(side="right", padx=5, pady=5)
+        med_rows.append(row)
+        return row
+    
+    ## Show a medication in a row (new or recycled) and add its subtotal to the running total
+    def fill_med_row(row, med):
+        price = float(med['price']) if med['price'] else 0.0
+        qty = int(med['quantity']) if med['quantity'] else 1
+        subtotal = price * qty
+        medication_total[0] += subtotal
         
-        meds = db.query("SELECT * FROM medications WHERE diagnosis_id = ? ORDER BY id",
-                       (diagnosis_id,))
+        row['name'].configure(text=f"{med['medicine_name']} x{qty}")
+        row['sub'].configure(text=f"₱{subtotal:,.2f}")
         
-        if not meds:
-            ctk.CTkLabel(med_list_frame, text="No medications prescribed",
-                        text_color="gray", font=F(12)).pack(pady=10)
-            update_total()
-            return
+        ## Remove a medication from the diagnosis (UI callback); only its own row goes
+        def delete_med(mid=med['id']):
+            if messagebox.askyesno("Confirm", "Delete this medication?"):
+                res = DiagnosisView.delete_med_logic(mid)
+                if not res.get('ok'):
+                    messagebox.showerror('Error', res.get('error', 'Failed to delete medication'))
+                    return
+                # re-read the total rather than subtracting, so float error can't pile up
+                medication_total[0] = Medication.total_for_diagnosis(med['diagnosis_id'])
+                appointment_meds.pop(med['diagnosis_id'], None)
+                med_rows.remove(row)
+                row['frame'].destroy()
+                show_med_placeholder()
+                update_total()
+        row['btn'].configure(command=delete_med)
+    
+    ## Append one medication row and add its subtotal to the running total
+    def append_med_row(med):
+        hide_med_placeholder()
+        fill_med_row(new_med_row(), med)
+    
+    ## Display medications for a given diagnosis id (queried unless already fetched)
+    def load_medications(diagnosis_id, meds=None):
+        hide_med_placeholder()
+        medication_total[0] = 0.0
+        if meds is None:
+            meds = db.query(_MEDS_BY_DIAGNOSIS_SQL, (diagnosis_id,)) if diagnosis_id else []
         
-        for med in meds:
-            medications_data.append(dict(med))
-            med_row = ctk.CTkFrame(med_list_frame, fg_color="#fff5eb", corner_radius=5)
-            med_row.pack(fill="x", padx=5, pady=2)
-            
-            price = float(med['price']) if med['price'] else 0.0
-            qty = int(med['quantity']) if med['quantity'] else 1
-            subtotal = price * qty
-            
-            ctk.CTkLabel(med_row, text=f"{med['medicine_name']} x{qty}",
-                        font=F(11), anchor="w").pack(side="left", padx=10, pady=5)
-            ctk.CTkLabel(med_row, text=f"₱{subtotal:,.2f}",
-                        font=F(11, "bold"), anchor="e").pack(side="right", padx=10, pady=5)
-            
-            ## Remove a medication from the diagnosis (UI callback)
-            def delete_med(mid=med['id']):
-                        if messagebox.askyesno("Confirm", "Delete this medication?"):
-                            dv = DiagnosisView()
-                            res = dv.delete_med_logic(mid)
-                            if not res.get('ok'):
-                                messagebox.showerror('Error', res.get('error', 'Failed to delete medication'))
-                            if selected_diagnosis[0]:
-                                load_medications(selected_diagnosis[0]['id'])
-            
-            ctk.CTkButton(med_row, text="X", width=30 + module_scale, height=30 + module_scale, fg_color="#e74c3c",
-                         command=delete_med).pack(side="right", padx=5, pady=5)
+        # recycle existing rows in place; only the difference is created or destroyed
+        while len(med_rows) > len(meds):
+            med_rows.pop()['frame'].destroy()
+        for i, med in enumerate(meds):
+            fill_med_row(med_rows[i] if i < len(med_rows) else new_med_row(), med)
         
+        show_med_placeholder("No medications prescribed" if diagnosis_id else "No medications yet")
         update_total()
     
     total_label = ctk.CTkLabel(form_container, text="Medication Total: ₱0.00",
                                font=F(14, "bold"), text_color="#e67e22")
     total_label.pack(anchor="e", pady=5)
     
-    ## Recalculate medication total and update UI label
+    ## Show the running medication total in the UI label
     def update_total():
-        total = sum(float(m.get('price', 0)) * int(m.get('quantity', 1)) for m in medications_data)
-        total_label.configure(text=f"Medication Total: ₱{total:,.2f}")
+        total_label.configure(text=f"Medication Total: ₱{medication_total[0]:,.2f}")
     
     ## UI handler: add medication to selected diagnosis (validates input)
     def add_medication():
@@ -513,7 +792,8 @@ def show_diagnosis_view(parent):
         # read selected medicine (from the browser selection)
         sel = (selected_med_display[0] or "").strip()
         # map back to real medicine name if display used
-        med_name = display_map.get(sel, sel)
+        med = display_map.get(sel)
+        med_name = med['name'] if med else sel
         price_str = price_entry.get().strip()
         qty_str = qty_entry.get().strip()
 
@@ -533,24 +813,22 @@ def show_diagnosis_view(parent):
             messagebox.showerror("Error", "Invalid quantity format.")
             return
 
-        dv = DiagnosisView()
-        res = dv.add_medication_logic(selected_diagnosis[0]['id'], med_name, price, qty)
+        res = DiagnosisView.add_medication_logic(selected_diagnosis[0]['id'], med_name, price, qty)
         if not res.get('ok'):
             messagebox.showerror('Error', res.get('error', 'Failed to add medication'))
             return
 
         # clear browser selection
         selected_med_display[0] = None
-        for child in med_browser_frame.winfo_children():
-            try:
-                child.configure(fg_color="#ffffff")
-            except Exception:
-                pass
+        med_browser.selection_clear(0, "end")
         price_entry.delete(0, "end")
         qty_entry.delete(0, "end")
         qty_entry.insert(0, "1")
 
-        load_medications(selected_diagnosis[0]['id'])
+        # add just the new row rather than rebuilding the whole list
+        appointment_meds.pop(selected_diagnosis[0]['id'], None)
+        append_med_row(res['med'])
+        update_total()
         messagebox.showinfo("Success", f"Medication '{med_name}' added successfully!")
     
     ctk.CTkButton(med_input_frame, text="Add Medication", command=add_medication,
@@ -560,73 +838,63 @@ def show_diagnosis_view(parent):
     med_use_label = ctk.CTkLabel(med_input_frame, text="Use:", font=F(11), text_color="#7f8c8d")
     med_use_label.grid(row=0, column=4, sticky="w", padx=8)
 
+    # display value -> {'name', 'price', 'use'}, filled once per refresh and read by select_med
     display_map = {}
 
     ## Populate medicine browser list and map display names
     def refresh_medicine_list():
-        # populate combo and browser; tolerate missing 'use' column
-        try:
-            meds = db.query("SELECT name, price, use FROM medicines ORDER BY name")
-        except Exception:
-            # fallback if 'use' column not present
-            meds = db.query("SELECT name, price FROM medicines ORDER BY name")
+        # populate browser; the 'use' column is guaranteed by the schema migration
+        if _medicine_cache['rows'] is not None:
+            fill_medicine_browser()
+            return
+        
+        ## First fill: the list is read on the background reader, then shown
+        version = _medicine_cache['version']
+        def on_rows(rows):
+            if version == _medicine_cache['version']:
+                _medicine_cache['rows'] = rows
+            fill_medicine_browser(rows)
+        db.query_async(med_browser, "SELECT name, price, COALESCE(use, '') FROM medicines ORDER BY name",
+                       (), on_rows)
+    
+    ## Show the cached medicine rows in the browser, mapping display values back to them
+    def fill_medicine_browser(rows=None):
         values = []
         display_map.clear()
-        for m in meds:
-            try:
-                use_text = m.get('use', '') if isinstance(m, dict) else (m['use'] if 'use' in m else '')
-            except Exception:
-                use_text = ''
-            disp = f"{m['name']} — {use_text}" if use_text else m['name']
+        for name, price, use_text in (_medicine_cache['rows'] if rows is None else rows):
+            disp = f"{name} — {use_text}" if use_text else name
             values.append(disp)
-            display_map[disp] = m['name']
+            display_map[disp] = {'name': name, 'price': price, 'use': use_text}
         # populate combo removed; browser will show values
         # populate browser
-        for w in med_browser_frame.winfo_children():
-            w.destroy()
-        for disp in values:
-            item = ctk.CTkFrame(med_browser_frame, fg_color="#ffffff", corner_radius=6)
-            item.pack(fill="x", padx=4, pady=2)
-            lbl = ctk.CTkLabel(item, text=disp, font=F(11), anchor="w")
-            lbl.pack(side="left", padx=8, pady=6, fill="x", expand=True)
-            ## Select medicine from browser and highlight in UI
-            def on_item_click(e=None, d=disp, item_ref=item):
-                # visually mark selection
-                for child in med_browser_frame.winfo_children():
-                    try:
-                        child.configure(fg_color="#ffffff")
-                    except Exception:
-                        pass
-                try:
-                    item_ref.configure(fg_color="#e8f8f5")
-                except Exception:
-                    pass
-                selected_med_display[0] = d
-                select_med(d)
-            item.bind("<Button-1>", on_item_click)
-            lbl.bind("<Button-1>", on_item_click)
+        med_browser.delete(0, "end")
+        if values:
+            med_browser.insert("end", *values)
+        selected_med_display[0] = None
+        
+        ## Select medicine from browser (the Listbox highlights it)
+        def on_med_select(e=None):
+            sel = med_browser.curselection()
+            if not sel:
+                return
+            d = med_browser.get(sel[0])
+            selected_med_display[0] = d
+            select_med(d)
+        med_browser.bind("<<ListboxSelect>>", on_med_select)
 
         ## Given a display value, load medicine details into inputs
         def select_med(display_value):
-            med_name = display_map.get(display_value, display_value)
-            if not med_name:
-                return
-            med = db.query("SELECT * FROM medicines WHERE name = ?", (med_name,))
+            med = display_map.get(display_value)
             if not med:
                 return
-            med = med[0]
             try:
                 price_entry.delete(0, 'end')
                 price_entry.insert(0, f"{float(med['price']):.2f}")
             except Exception:
                 pass
-            try:
-                use_text = med.get('use', '') if isinstance(med, dict) else (med['use'] if 'use' in med else '')
-            except Exception:
-                use_text = ''
-            med_use_label.configure(text=f"Use: {use_text or ''}", font=F(10))
+            med_use_label.configure(text=f"Use: {med['use'] or ''}", font=F(10))
 
-    # initial population
+    # initial population: cached rows fill at once, otherwise the background reader fetches them
     refresh_medicine_list()
     
     ## Save diagnosis text for selected appointment (UI action)
@@ -643,8 +911,7 @@ def show_diagnosis_view(parent):
         apt = selected_apt[0]
         today = datetime.now().strftime('%Y-%m-%d')
         
-        dv = DiagnosisView()
-        res = dv.save_diagnosis_logic(apt, diag_text, selected_diagnosis[0])
+        res = DiagnosisView.save_diagnosis_logic(apt, diag_text, selected_diagnosis[0])
         if res.get('updated'):
             messagebox.showinfo("Success", "Diagnosis updated successfully!")
         elif res.get('created'):
@@ -657,8 +924,9 @@ def show_diagnosis_view(parent):
                 'diagnosis_date': res['diagnosis_date']
             }
             messagebox.showinfo("Success", "Diagnosis saved successfully! You can now add medications.")
+            # only a new diagnosis changes the list; update that one card instead of reloading it
+            mark_selected_card_diagnosed()
         
-        load_appointments(search_entry.get())
         load_diagnosis_for_appointment(apt['id'])
     
     ## Generate and save a plain-text medical certificate for selected diag
@@ -670,8 +938,8 @@ def show_diagnosis_view(parent):
         apt = selected_apt[0]
         diag = selected_diagnosis[0]
         
-        patient = db.query("SELECT * FROM patients WHERE id = ?", (apt['patient_id'],))
-        doctor = db.query("SELECT * FROM doctors WHERE id = ?", (apt['doctor_id'],))
+        patient = db.query("SELECT name, species, breed, age, owner_name, owner_contact FROM patients WHERE id = ?", (apt['patient_id'],))
+        doctor = db.query("SELECT name, specialization FROM doctors WHERE id = ?", (apt['doctor_id'],))
         
         if not patient or not doctor:
             messagebox.showerror("Error", "Could not retrieve patient or doctor information.")
@@ -680,15 +948,16 @@ def show_diagnosis_view(parent):
         patient = patient[0]
         doctor = doctor[0]
         
-        meds = db.query("SELECT * FROM medications WHERE diagnosis_id = ?", (diag['id'],))
+        meds = db.query(_CERT_MEDS_SQL, (diag['id'],))
         
+        now = datetime.now()
         lines = []
-        lines.append("=" * 70)
+        lines.append(_RULE_EQ)
         lines.append("                    VET CLINIC MANAGEMENT SYSTEM")
         lines.append("                      MEDICAL CERTIFICATE")
-        lines.append("=" * 70)
-        lines.append(f"Certificate Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        lines.append("-" * 70)
+        lines.append(_RULE_EQ)
+        lines.append(f"Certificate Date: {now.strftime('%Y-%m-%d %H:%M:%S')}")
+        lines.append(_RULE_DASH)
         lines.append("")
         lines.append("PATIENT INFORMATION:")
         lines.append(f"  Pet Name:     {patient['name']}")
@@ -700,37 +969,32 @@ def show_diagnosis_view(parent):
         lines.append(f"  Owner Name:   {patient['owner_name']}")
         lines.append(f"  Contact:      {patient['owner_contact']}")
         lines.append("")
-        lines.append("-" * 70)
+        lines.append(_RULE_DASH)
         lines.append("ATTENDING VETERINARIAN:")
         lines.append(f"  Name:           {doctor['name']}")
         lines.append(f"  Specialization: {doctor['specialization']}")
         lines.append("")
-        lines.append("-" * 70)
+        lines.append(_RULE_DASH)
         lines.append("APPOINTMENT DETAILS:")
         lines.append(f"  Date:    {apt['date']}")
         lines.append(f"  Time:    {apt['time']}")
         lines.append("")
-        lines.append("-" * 70)
+        lines.append(_RULE_DASH)
         lines.append("DIAGNOSIS:")
         lines.append(f"  {diag['diagnosis_text']}")
         lines.append("")
         
         if meds:
-            lines.append("-" * 70)
+            lines.append(_RULE_DASH)
             lines.append("PRESCRIBED MEDICATIONS:")
-            med_total = 0.0
             for idx, med in enumerate(meds, 1):
-                price = float(med['price']) if med['price'] else 0.0
-                qty = int(med['quantity']) if med['quantity'] else 1
-                subtotal = price * qty
-                med_total += subtotal
                 lines.append(f"  {idx}. {med['medicine_name']}")
-                lines.append(f"     Quantity: {qty} | Unit Price: P{price:,.2f} | Subtotal: P{subtotal:,.2f}")
+                lines.append(f"     Quantity: {med['qty']} | Unit Price: P{med['price']:,.2f} | Subtotal: P{med['subtotal']:,.2f}")
             lines.append("")
-            lines.append(f"  MEDICATION TOTAL: P{med_total:,.2f}")
+            lines.append(f"  MEDICATION TOTAL: P{meds[0]['total']:,.2f}")
         
         lines.append("")
-        lines.append("=" * 70)
+        lines.append(_RULE_EQ)
         lines.append("")
         lines.append("This is to certify that the above-mentioned patient has been")
         lines.append("examined and diagnosed at our veterinary clinic.")
@@ -740,16 +1004,14 @@ def show_diagnosis_view(parent):
         lines.append(f"         {doctor['name']}")
         lines.append(f"     Licensed Veterinarian")
         lines.append("")
-        lines.append("=" * 70)
+        lines.append(_RULE_EQ)
         lines.append("This is a computer-generated medical certificate.")
-        lines.append("=" * 70)
-        
-        certificate_text = "\n".join(lines)
+        lines.append(_RULE_EQ)
         
         try:
-            filename = f"medical_certificate_{apt['id']}_{datetime.now().strftime('%Y%m%d%H%M%S')}.txt"
+            filename = f"medical_certificate_{apt['id']}_{now.strftime('%Y%m%d%H%M%S')}.txt"
             with open(filename, 'w', encoding='utf-8') as f:
-                f.write(certificate_text)
+                f.write("\n".join(lines))
             messagebox.showinfo("Success",
                               f"Medical Certificate saved to {filename}\n\nYou can print this file.")
         except Exception as e:
@@ -770,11 +1032,7 @@ def show_diagnosis_view(parent):
         # clear selected medicine in browser
         try:
             selected_med_display[0] = None
-            for child in med_browser_frame.winfo_children():
-                try:
-                    child.configure(fg_color="#ffffff")
-                except Exception:
-                    pass
+            med_browser.selection_clear(0, "end")
         except Exception:
             pass
         price_entry.delete(0, "end")
@@ -784,7 +1042,9 @@ def show_diagnosis_view(parent):
         apt_info_label.configure(text="Select an appointment from the left panel", font=F(11))
         for w in med_list_frame.winfo_children():
             w.destroy()
-        medications_data.clear()
+        med_empty_label[0] = None
+        med_rows.clear()
+        medication_total[0] = 0.0
         update_total()
     
     ctk.CTkButton(btn_frame, text="Clear", command=clear_form,
@@ -13,6 +13,7 @@ This module provides doctor-focused views with:
 import customtkinter as ctk
 from tkcalendar import Calendar
 from datetime import datetime, date
+import appointments
 
 app = None
 db = None
@@ -30,12 +31,14 @@ class Doctor:
         else:
             db.execute("INSERT INTO doctors (name, specialization, fee) VALUES (?, ?, ?)",
                        (self.name, self.specialization, self.fee))
+        appointments.invalidate_lookup_cache()
 
     ## delete
     def delete(self):
         if not self.id:
             raise ValueError('Doctor id required')
         db.execute("DELETE FROM doctors WHERE id=?", (self.id,))
+        appointments.invalidate_lookup_cache()
 
 
 class DoctorView:
@@ -92,10 +95,11 @@ class DoctorView:
         def on_doctor_select(choice):
             if not choice or ':' not in choice:
                 return
+            head = choice.partition(':')[0].strip()
             try:
-                selected_doctor[0] = int(choice.split(':', 1)[0].strip())
-            except Exception:
-                selected_doctor[0] = choice.split(':', 1)[0].strip()
+                selected_doctor[0] = int(head)
+            except ValueError:
+                selected_doctor[0] = head
             try:
                 refresh_calendar()
             except Exception:
@@ -278,7 +282,7 @@ class DoctorView:
         # Initialize with first doctor and today's view
         if doctor_options:
             try:
-                selected_doctor[0] = int(doctor_options[0].split(':')[0].strip())
+                selected_doctor[0] = int(doctor_options[0].partition(':')[0].strip())
             except Exception:
                 selected_doctor[0] = None
             refresh_calendar()
@@ -138,27 +138,35 @@ class InvoiceView:
                             text_color="gray").pack(pady=20)
                 return
 
+            # diagnoses and their medication totals for all of the client's completed
+            # appointments in one query, instead of one query per appointment and diagnosis
+            diag_by_apt = {}
+            for row in db.query("""
+                SELECT dg.appointment_id, dg.id,
+                       (SELECT SUM(m.price * m.quantity) FROM medications m WHERE m.diagnosis_id = dg.id) AS total
+                FROM diagnoses dg
+                JOIN appointments a ON dg.appointment_id = a.id
+                JOIN patients p ON a.patient_id = p.id
+                WHERE p.owner_name = ? AND p.owner_contact = ? AND a.status = 'completed'
+                ORDER BY dg.appointment_id, dg.id
+            """, (client['owner_name'], client['owner_contact'])):
+                diag_by_apt.setdefault(row['appointment_id'], []).append(row)
+
             for apt in appointments:
                 frame = ctk.CTkFrame(self.appointments_list, fg_color="#f8f9fa", corner_radius=5)
                 frame.pack(fill="x", pady=5, padx=5)
 
                 var = ctk.BooleanVar(value=False)
 
-                diagnoses = db.query("SELECT id FROM diagnoses WHERE appointment_id = ?", (apt['id'],))
+                diagnoses = diag_by_apt.get(apt['id'], [])
                 has_diagnosis = len(diagnoses) > 0
 
                 med_total = 0.0
                 diagnosis_ids = []
-                if has_diagnosis:
-                    for diag in diagnoses:
-                        diagnosis_ids.append(diag['id'])
-                        meds = db.query("""
-                            SELECT SUM(price * quantity) as total 
-                            FROM medications 
-                            WHERE diagnosis_id = ?
-                        """, (diag['id'],))
-                        if meds and meds[0]['total']:
-                            med_total += float(meds[0]['total'])
+                for diag in diagnoses:
+                    diagnosis_ids.append(diag['id'])
+                    if diag['total']:
+                        med_total += float(diag['total'])
 
                 apt_dict = dict(apt)
                 apt_dict['has_diagnosis'] = has_diagnosis
@@ -24,7 +24,6 @@ import customtkinter as ctk
 from tkinter import messagebox
 import tkinter as tk
 from database import Database
-import sqlite3
 from pathlib import Path
 
 import patients
@@ -127,38 +126,6 @@ class VetClinicApp(ctk.CTk):
 
         dashboard.show_dashboard_view(self.content)
 
-        db = Path(__file__).with_name('vet_clinic.db')
-        conn = sqlite3.connect(str(db))
-        cur = conn.cursor()
-
-        # Ensure required tables exist to prevent "no such table: diagnoses" errors
-        cur.executescript("""
-        PRAGMA foreign_keys = ON;
-
-        CREATE TABLE IF NOT EXISTS diagnoses (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            appointment_id INTEGER NOT NULL,
-            patient_id INTEGER,
-            doctor_id INTEGER,
-            diagnosis_text TEXT,
-            diagnosis_date TEXT,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-        );
-
-        CREATE TABLE IF NOT EXISTS medications (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            diagnosis_id INTEGER NOT NULL,
-            medicine_name TEXT,
-            quantity INTEGER DEFAULT 1,
-            price REAL DEFAULT 0.0,
-            FOREIGN KEY(diagnosis_id) REFERENCES diagnoses(id) ON DELETE CASCADE
-        );
-        """)
-
-        cur.execute("UPDATE doctors SET fee=? WHERE name=?", (15000.00, 'Dr. Princess Valdez'))
-        conn.commit()
-        conn.close()
-
 ## Application entry point: show login, initialize and run the app
 def main():
     """Main entry point with proper cleanup"""
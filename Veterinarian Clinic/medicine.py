@@ -17,6 +17,7 @@ Notes:
 import customtkinter as ctk
 from tkinter import messagebox
 from abc import ABC, abstractmethod
+import diagnosis
 
 app = None
 db = None
@@ -59,7 +60,7 @@ class Medicine(MedicineBase):
         
         # If med_id is provided, update by ID (editing existing medicine)
         if med_id is not None:
-            existing = db.query("SELECT * FROM medicines WHERE id = ?", (med_id,))
+            existing = db.scalar("SELECT EXISTS(SELECT 1 FROM medicines WHERE id = ?)", (med_id,))
             if existing:
                 # update by id
                 db.execute("UPDATE medicines SET name=?, stock=?, price=?, form=?, use=?, supplier_name=?, supplier_contact=? WHERE id=?",
@@ -68,7 +69,7 @@ class Medicine(MedicineBase):
                 raise ValueError('Medicine not found')
         else:
             # New medicine or update by name
-            existing = db.query("SELECT * FROM medicines WHERE name = ?", (self.name,))
+            existing = db.scalar("SELECT EXISTS(SELECT 1 FROM medicines WHERE name = ?)", (self.name,))
             if existing:
                 # update by name
                 db.execute("UPDATE medicines SET stock=?, price=?, form=?, use=?, supplier_name=?, supplier_contact=? WHERE name=?",
@@ -77,10 +78,12 @@ class Medicine(MedicineBase):
                 # insert new
                 db.execute("INSERT INTO medicines (name, stock, price, form, use, supplier_name, supplier_contact) VALUES (?, ?, ?, ?, ?, ?, ?)",
                            (self.name, self.stock, self.price, getattr(self, 'form', None), getattr(self, 'use', None), self.supplier_name, self.supplier_contact))
+        diagnosis.invalidate_medicine_cache()
 
     ## Delete medicine by name
     def delete(self):
         db.execute("DELETE FROM medicines WHERE name = ?", (self.name,))
+        diagnosis.invalidate_medicine_cache()
 
     @staticmethod
     @staticmethod
@@ -236,7 +239,7 @@ def show_medicine_view(parent):
         ]
         inserted = 0
         for name, stock, price, form_val, sname, scontact in samples:
-            existing = db.query("SELECT * FROM medicines WHERE name = ?", (name,))
+            existing = db.scalar("SELECT EXISTS(SELECT 1 FROM medicines WHERE name = ?)", (name,))
             if not existing:
                 try:
                     db.execute("INSERT INTO medicines (name, stock, price, form, use, supplier_name, supplier_contact) VALUES (?, ?, ?, ?, ?, ?, ?)",
@@ -244,6 +247,7 @@ def show_medicine_view(parent):
                     inserted += 1
                 except Exception:
                     pass
+        diagnosis.invalidate_medicine_cache()
         messagebox.showinfo('Sample Load', f'Inserted {inserted} sample medicines (duplicates skipped).')
         load_meds()
 
@@ -298,9 +302,9 @@ def show_medicine_view(parent):
         if not selected_med_id[0]:
             return
         if messagebox.askyesno('Confirm', 'Delete this medicine from inventory?'):
-            med = db.query('SELECT * FROM medicines WHERE id = ?', (selected_med_id[0],))
-            if med:
+            if db.scalar('SELECT EXISTS(SELECT 1 FROM medicines WHERE id = ?)', (selected_med_id[0],)):
                 db.execute('DELETE FROM medicines WHERE id = ?', (selected_med_id[0],))
+                diagnosis.invalidate_medicine_cache()
             clear_form()
             load_meds()
 
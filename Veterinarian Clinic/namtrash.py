@@ -5,6 +5,7 @@ Simple "trash" module to hold recently deleted patient records.
 # It stores recently deleted patient rows so they can be restored or permanently removed.
 import customtkinter as ctk
 from tkinter import messagebox
+import appointments
 
 app = None
 db = None
@@ -62,7 +63,7 @@ def restore_deleted(record_id):
     r = row[0]
     pid = r['patient_id']
     # If original patient row exists, un-delete it. Otherwise insert with explicit id to preserve id.
-    existing = db.query("SELECT * FROM patients WHERE id=?", (pid,))
+    existing = db.scalar("SELECT EXISTS(SELECT 1 FROM patients WHERE id=?)", (pid,))
     if existing:
         db.execute("UPDATE patients SET is_deleted=0 WHERE id=?", (pid,))
         new_id = pid
@@ -85,6 +86,7 @@ def restore_deleted(record_id):
             )
             new_id = restored[0]['id'] if restored else None
     db.execute("DELETE FROM recent_deleted WHERE id=?", (record_id,))
+    appointments.invalidate_lookup_cache()
     return new_id
 
 
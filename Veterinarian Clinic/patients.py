@@ -5,6 +5,7 @@ import customtkinter as ctk
 from tkinter import messagebox
 from abc import ABC, abstractmethod
 import namtrash
+import appointments
 
 app = None
 db = None
@@ -56,6 +57,7 @@ class Patient(PatientBase):
                 """,
                 (self.name, self.species, self.breed, self.age, self.owner_name, self.owner_contact, self.notes)
             )
+        appointments.invalidate_lookup_cache()
 
     ## Save delegator (fulfills abstract interface)
     def save(self):
@@ -77,6 +79,7 @@ class Patient(PatientBase):
                 pass
         # Soft-delete: mark patient as deleted so appointments keep their FK intact
         db.execute("UPDATE patients SET is_deleted=1 WHERE id=?", (self.id,))
+        appointments.invalidate_lookup_cache()
 
     @staticmethod
     ## Return list of patients, optional filtering by query and species
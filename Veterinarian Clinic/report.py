@@ -9,6 +9,12 @@ app = None
 db = None
 refs = {}
 
+# Rulers and boxed headers reused by every textbox render
+_RULE = "=" * 90 + "\n"
+_THIN_RULE = "-" * 90 + "\n"
+_STATS_RULE = "=" * 40 + "\n"
+_CLIENT_HEADER = _RULE + "COMPLETED APPOINTMENTS - CLIENT\n" + _RULE
+
 ## format_doctor_name
 def format_doctor_name(name):
     """Avoid doubling the 'Dr.' prefix when doctor name already includes it."""
@@ -105,12 +111,14 @@ class Report:
 
     ## stats
     def stats(self):
-        return {
-            'total_clients': len(db.query("SELECT DISTINCT owner_name, owner_contact FROM patients WHERE is_deleted=0")),
-            'total_pets': len(db.query("SELECT * FROM patients WHERE is_deleted=0")),
-            'total_apts': len(db.query("SELECT * FROM appointments")),
-            'completed_apts': len(db.query("SELECT * FROM appointments WHERE status='completed'"))
-        }
+        # all four counters in one round-trip
+        row = db.query("""
+            SELECT (SELECT COUNT(*) FROM (SELECT DISTINCT owner_name, owner_contact FROM patients WHERE is_deleted=0)) AS total_clients,
+                   (SELECT COUNT(*) FROM patients WHERE is_deleted=0) AS total_pets,
+                   (SELECT COUNT(*) FROM appointments) AS total_apts,
+                   (SELECT COUNT(*) FROM appointments WHERE status='completed') AS completed_apts
+        """)[0]
+        return dict(row)
 
     ## top_clients_by_visits
     def top_clients_by_visits(self):
@@ -249,67 +257,74 @@ class ReportView:
     ## update_stats
     def update_stats(self):
         s = self.report.stats()
-        self.stats_text.delete('1.0', 'end')
-        self.stats_text.insert("end", "CLINIC STATISTICS\n")
-        self.stats_text.insert("end", "="*40 + "\n\n")
-        
-        self.stats_text.insert("end", f"Total Clients:           {s['total_clients']}\n")
-        self.stats_text.insert("end", f"Total Pets:              {s['total_pets']}\n")
-        self.stats_text.insert("end", f"Total Appointments:     {s['total_apts']}\n")
-        self.stats_text.insert("end", f"Completed Appointments: {s['completed_apts']}\n")
-        
-        self.stats_text.insert("end", "\n" + "="*40 + "\n")
-        self.stats_text.insert("end", "TOP CLIENTS BY VISITS\n")
-        self.stats_text.insert("end", "="*40 + "\n\n")
-        
+        parts = [
+            "CLINIC STATISTICS\n",
+            _STATS_RULE + "\n",
+            f"Total Clients:           {s['total_clients']}\n",
+            f"Total Pets:              {s['total_pets']}\n",
+            f"Total Appointments:     {s['total_apts']}\n",
+            f"Completed Appointments: {s['completed_apts']}\n",
+            "\n" + _STATS_RULE,
+            "TOP CLIENTS BY VISITS\n",
+            _STATS_RULE + "\n",
+        ]
+
         top_clients = self.report.top_clients_by_visits()
         if top_clients:
             for idx, row in enumerate(top_clients, 1):
                 visits = row['visits']
-                self.stats_text.insert("end", f"{idx}. {row['owner_name']:<28} {visits} visit(s)\n")
+                parts.append(f"{idx}. {row['owner_name']:<28} {visits} visit(s)\n")
         else:
-            self.stats_text.insert("end", "No completed visits recorded yet.\n")
-        
-        self.stats_text.configure(state="disabled")
+            parts.append("No completed visits recorded yet.\n")
 
-    ## generate_report
-    def generate_report(self, search_query=""):
-        self.report_display.delete("1.0", "end")
-        clients = self.report.find_clients(search_query)
-        if not clients:
-            self.report_display.insert("end", "No clients found matching your search.\n")
-            return
+        # one insert per render; the box is read-only between renders
+        self.stats_text.configure(state="normal")
+        self.stats_text.delete('1.0', 'end')
+        self.stats_text.insert("end", "".join(parts))
+        self.stats_text.configure(state="disabled")
 
+    ## _client_sections
+    def _client_sections(self, clients):
+        """Build the per-client completed-visit report as a list of text fragments."""
+        parts = []
         for client in clients:
-            self.report_display.insert("end", "="*90 + "\n")
-            self.report_display.insert("end", f"COMPLETED APPOINTMENTS - CLIENT\n")
-            self.report_display.insert("end", "="*90 + "\n")
-            self.report_display.insert("end", f"Owner Name: {client['owner_name']}\n")
-            self.report_display.insert("end", f"Contact: {client['owner_contact']}\n")
-            self.report_display.insert("end", f"Report Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            self.report_display.insert("end", "-"*90 + "\n\n")
+            parts.append(_CLIENT_HEADER)
+            parts.append(f"Owner Name: {client['owner_name']}\n")
+            parts.append(f"Contact: {client['owner_contact']}\n")
+            parts.append(f"Report Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+            parts.append(_THIN_RULE + "\n")
 
             pets = self.report.get_pets_for_client(client['owner_name'], client['owner_contact'])
             if not pets:
-                self.report_display.insert("end", "No pets found for this client.\n\n")
+                parts.append("No pets found for this client.\n\n")
                 continue
 
             for idx, pet in enumerate(pets, 1):
-                self.report_display.insert("end", f"[PET #{idx}] {pet['name']} ({pet['species']})\n")
+                parts.append(f"[PET #{idx}] {pet['name']} ({pet['species']})\n")
                 completed_apts = self.report.get_completed_appointments_for_patient(pet['id'])
                 if completed_apts:
-                    self.report_display.insert("end", f"  Completed Visits ({len(completed_apts)}):\n")
+                    parts.append(f"  Completed Visits ({len(completed_apts)}):\n")
                     for apt in completed_apts:
                         fee_value = float(apt['fee']) if apt['fee'] else 0.0
                         fee_str = f"P{fee_value:,.2f}"
-                        self.report_display.insert("end", f"    - {apt['date']} at {apt['time']} | {apt['doctor_name']} ({apt['specialization']}) | Fee: {fee_str}\n")
+                        parts.append(f"    - {apt['date']} at {apt['time']} | {apt['doctor_name']} ({apt['specialization']}) | Fee: {fee_str}\n")
                         if apt['notes']:
-                            self.report_display.insert("end", f"       Notes: {apt['notes']}\n")
+                            parts.append(f"       Notes: {apt['notes']}\n")
                 else:
-                    self.report_display.insert("end", "  No completed visits for this pet.\n")
-                self.report_display.insert("end", "\n")
+                    parts.append("  No completed visits for this pet.\n")
+                parts.append("\n")
 
-            self.report_display.insert("end", "="*90 + "\n\n")
+            parts.append(_RULE + "\n")
+        return parts
+
+    ## generate_report
+    def generate_report(self, search_query=""):
+        self.report_display.delete("1.0", "end")
+        clients = self.report.find_clients(search_query)
+        if not clients:
+            self.report_display.insert("end", "No clients found matching your search.\n")
+            return
+        self.report_display.insert("end", "".join(self._client_sections(clients)))
 
     ## export_report
     def export_report(self):
@@ -336,43 +351,47 @@ class ReportView:
         summary_rows = self.report.get_monthly_summary(year)
 
         # Header
-        self.report_display.insert("end", "="*90 + "\n")
-        self.report_display.insert("end", f"MONTHLY REPORT - {year}-{int(month):02d}\n")
-        self.report_display.insert("end", "="*90 + "\n")
-        self.report_display.insert("end", f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-        self.report_display.insert("end", "-"*90 + "\n\n")
+        parts = [
+            _RULE,
+            f"MONTHLY REPORT - {year}-{int(month):02d}\n",
+            _RULE,
+            f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n",
+            _THIN_RULE + "\n",
+        ]
 
         # Year summary
         if summary_rows:
-            self.report_display.insert("end", "YEAR SUMMARY (Completed Appointments)\n")
+            parts.append("YEAR SUMMARY (Completed Appointments)\n")
             for row in summary_rows:
                 fee_val = float(row['total_fee']) if row['total_fee'] else 0.0
                 fee_str = f"P{fee_val:,.2f}"
-                self.report_display.insert("end", f"  - {row['year']}-{int(row['month']):02d}: {row['count']} visit(s), Total Fees: {fee_str}\n")
-            self.report_display.insert("end", "\n")
+                parts.append(f"  - {row['year']}-{int(row['month']):02d}: {row['count']} visit(s), Total Fees: {fee_str}\n")
+            parts.append("\n")
         else:
-            self.report_display.insert("end", "No completed appointments recorded this year.\n\n")
+            parts.append("No completed appointments recorded this year.\n\n")
 
         # Details for selected month
-        self.report_display.insert("end", f"DETAILS FOR {year}-{int(month):02d}\n")
-        self.report_display.insert("end", "-"*90 + "\n")
+        parts.append(f"DETAILS FOR {year}-{int(month):02d}\n")
+        parts.append(_THIN_RULE)
         if details:
             total_fee = 0.0
             for apt in details:
                 fee_value = float(apt['fee']) if apt['fee'] else 0.0
                 total_fee += fee_value
                 fee_str = f"P{fee_value:,.2f}"
-                self.report_display.insert("end", (
+                parts.append(
                     f"- {apt['date']} {apt['time']} | {apt['doctor_name']} ({apt['specialization']}) | "
                     f"Pet: {apt['pet_name']} ({apt['species']}) | Owner: {apt['owner_name']} | Fee: {fee_str}\n"
-                ))
+                )
                 if apt['notes']:
-                    self.report_display.insert("end", f"    Notes: {apt['notes']}\n")
-            self.report_display.insert("end", "\n")
-            self.report_display.insert("end", f"Total Completed Visits: {len(details)}\n")
-            self.report_display.insert("end", f"Total Fees: P{total_fee:,.2f}\n")
+                    parts.append(f"    Notes: {apt['notes']}\n")
+            parts.append("\n")
+            parts.append(f"Total Completed Visits: {len(details)}\n")
+            parts.append(f"Total Fees: P{total_fee:,.2f}\n")
         else:
-            self.report_display.insert("end", "No completed appointments for this month.\n")
+            parts.append("No completed appointments for this month.\n")
+
+        self.report_display.insert("end", "".join(parts))
 
     ## show_completed_clients
     def show_completed_clients(self):
@@ -381,37 +400,7 @@ class ReportView:
         if not clients:
             self.report_display.insert("end", "No clients found with completed appointments.\n")
             return
-
-        for client in clients:
-            self.report_display.insert("end", "="*90 + "\n")
-            self.report_display.insert("end", f"COMPLETED APPOINTMENTS - CLIENT\n")
-            self.report_display.insert("end", "="*90 + "\n")
-            self.report_display.insert("end", f"Owner Name: {client['owner_name']}\n")
-            self.report_display.insert("end", f"Contact: {client['owner_contact']}\n")
-            self.report_display.insert("end", f"Report Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-            self.report_display.insert("end", "-"*90 + "\n\n")
-
-            pets = self.report.get_pets_for_client(client['owner_name'], client['owner_contact'])
-            if not pets:
-                self.report_display.insert("end", "No pets found for this client.\n\n")
-                continue
-
-            for idx, pet in enumerate(pets, 1):
-                self.report_display.insert("end", f"[PET #{idx}] {pet['name']} ({pet['species']})\n")
-                completed_apts = self.report.get_completed_appointments_for_patient(pet['id'])
-                if completed_apts:
-                    self.report_display.insert("end", f"  Completed Visits ({len(completed_apts)}):\n")
-                    for apt in completed_apts:
-                        fee_value = float(apt['fee']) if apt['fee'] else 0.0
-                        fee_str = f"P{fee_value:,.2f}"
-                        self.report_display.insert("end", f"    - {apt['date']} at {apt['time']} | {apt['doctor_name']} ({apt['specialization']}) | Fee: {fee_str}\n")
-                        if apt['notes']:
-                            self.report_display.insert("end", f"       Notes: {apt['notes']}\n")
-                else:
-                    self.report_display.insert("end", "  No completed visits for this pet.\n")
-                self.report_display.insert("end", "\n")
-
-            self.report_display.insert("end", "="*90 + "\n\n")
+        self.report_display.insert("end", "".join(self._client_sections(clients)))
 
 
 ## show_report_view